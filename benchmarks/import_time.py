@@ -0,0 +1,52 @@
+"""
+Measure the import time of cadquery_massembly in fresh interpreters
+
+    python benchmarks/import_time.py [repeat]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {
+    "eager (all modules)": "from cadquery_massembly import massembly, geom, cq_editor",
+    "import cadquery_massembly": "import cadquery_massembly",
+    "from ... import load": "from cadquery_massembly import load",
+    "from ... import MAssembly": "from cadquery_massembly import MAssembly",
+}
+
+PROBE = """
+import sys, time
+t = time.perf_counter()
+{statement}
+t = time.perf_counter() - t
+print(t, "cadquery" in sys.modules, "OCP.GeomAPI" in sys.modules)
+"""
+
+
+def measure(statement, repeat):
+    env = dict(os.environ, PYTHONPATH=os.path.join(os.path.dirname(__file__), ".."))
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(statement=statement)],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+        ).stdout.split()
+        times.append(float(out[0]))
+    return statistics.median(times), out[1] == "True", out[2] == "True"
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'statement':30s} {'median ms':>10s} {'cadquery':>9s} {'GeomAPI':>8s}")
+    for name, statement in STATEMENTS.items():
+        t, cadquery, geom_api = measure(statement, repeat)
+        print(f"{name:30s} {1000 * t:10.1f} {str(cadquery):>9s} {str(geom_api):>8s}")
+
+
+if __name__ == "__main__":
+    main()
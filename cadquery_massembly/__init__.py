@@ -1,9 +1,46 @@
 import warnings
 
-from .mate import Mate
-from .massembly import MAssembly, DOF
+from .kinematics import Program, Pose, load
+from .patterns import polar, linear, grid
 from ._version import __version_info__, __version__
 
+# cadquery and OCP are only imported on first use of one of these attributes, so that the
+# kinematics runtime can be used in processes without cadquery and command line tools start fast
+_lazy = {
+    "Mate": ".mate",
+    "MAssembly": ".massembly",
+    "DOF": ".massembly",
+    "Circle": ".geom",
+    "Line": ".geom",
+    "show_mates": ".cq_editor",
+    "PoseStream": ".streaming",
+    "DeltaEncoder": ".streaming",
+    "decode_delta": ".streaming",
+    "Tessellator": ".tessellation",
+    "FrameStore": ".framestore",
+    "Study": ".study",
+    "BuildCache": ".cache",
+}
+_lazy_modules = ("mate", "massembly", "geom", "cq_editor", "streaming", "tessellation", "framestore", "study", "cache")
+
+
+def __getattr__(name):
+    import importlib
+
+    if name in _lazy:
+        value = getattr(importlib.import_module(_lazy[name], __name__), name)
+    elif name in _lazy_modules:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy) | set(_lazy_modules))
+
 
 def relocate(assy):
     warnings.simplefilter("once", DeprecationWarning)
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import re
+import types
+import weakref
+from functools import wraps
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import cadquery as cq
+from cadquery import Workplane, Shape, Compound, Vector
+
+from .mate import Mate
+
+Part = Union[Workplane, Shape]
+
+
+# default reprs like "<cadquery.cq.Workplane object at 0x7f...>" differ between runs
+_ADDRESS = re.compile(r"<[^<>]* at 0x[0-9a-fA-F]+>")
+
+
+def _hash_code(code: types.CodeType, digest):
+    # the byte code, names and constants change whenever the body of the builder changes. Nested code objects
+    # (lambdas, comprehensions, inner functions) are hashed recursively, their repr contains their address
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _hash_code(const, digest)
+        else:
+            digest.update(repr(const).encode())
+
+
+def _code_digest(func: Callable) -> str:
+    code = getattr(func, "__code__", None)
+    if code is None:
+        return getattr(func, "__qualname__", repr(func))
+    digest = hashlib.sha256()
+    _hash_code(code, digest)
+    return digest.hexdigest()
+
+
+def _to_brep(shapes: List[Shape]) -> bytes:
+    stream = BytesIO()
+    (shapes[0] if len(shapes) == 1 else Compound.makeCompound(shapes)).exportBrep(stream)
+    return stream.getvalue()
+
+
+def _from_brep(data: bytes) -> Shape:
+    return Shape.importBrep(BytesIO(data))
+
+
+def _shapes(wp: Workplane) -> List[Shape]:
+    return [val for val in wp.vals() if isinstance(val, Shape)]
+
+
+class BuildCache:
+    def __init__(self, directory: str, max_size: int = 1 << 30, version: str = ""):
+        """
+        Opt-in disk cache of parts (BRep including tagged objects) and of the mates queried on them. Keys are
+        hashes of the builder code, the builder arguments and the selector strings, so a rerun with unchanged
+        parameters loads parts and mates instead of rebuilding them.
+        :param directory: cache directory
+        :param max_size: maximum size of the cache directory in bytes, least recently used entries are evicted
+        :param version: additional key component, change it to invalidate all entries (e.g. when helper
+                        functions called by the builders change)
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._keys: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self):
+        return (
+            f"BuildCache('{self.directory}', entries: {len(self._entries()) // 2}, hits: {self.hits}, "
+            f"misses: {self.misses})"
+        )
+
+    def key(self, builder: Callable, *args, **kwargs) -> str:
+        """
+        Cache key of a builder call
+        :param builder: function creating a part
+        :param args: positional arguments of the builder (their repr is hashed)
+        :param kwargs: keyword arguments of the builder (their repr is hashed)
+        :return: hex digest
+        """
+        arguments = [repr(args), repr(sorted(kwargs.items()))]
+        for argument in arguments:
+            match = _ADDRESS.search(argument)
+            if match is not None:
+                raise ValueError(
+                    f"Argument {match.group()} has no stable repr and cannot be part of a cache key, "
+                    "pass the parameters it is built from instead"
+                )
+        description = [
+            cq.__version__,
+            self.version,
+            getattr(builder, "__module__", ""),
+            getattr(builder, "__qualname__", ""),
+            _code_digest(builder),
+            *arguments,
+        ]
+        return hashlib.sha256("\n".join(map(str, description)).encode()).hexdigest()
+
+    def part(self, builder: Callable[..., Part], *args, **kwargs) -> Part:
+        """
+        Build a part or load it from the cache
+        :param builder: function creating a Workplane or Shape
+        :param args: positional arguments of the builder. Keys are built from the repr of the arguments, so
+                     use numbers, strings and other values with a stable repr, not e.g. Workplane objects
+        :param kwargs: keyword arguments of the builder
+        :return: the part, Workplane tags are restored
+        """
+        key = self.key(builder, *args, **kwargs)
+        part = self._load(key)
+        if part is None:
+            self.misses += 1
+            part = builder(*args, **kwargs)
+            self._store(key, part)
+        else:
+            self.hits += 1
+        self._keys[part] = key
+        return part
+
+    def cached(self, builder: Callable[..., Part]) -> Callable[..., Part]:
+        """Decorator to build parts through the cache"""
+
+        @wraps(builder)
+        def wrapper(*args, **kwargs):
+            return self.part(builder, *args, **kwargs)
+
+        return wrapper
+
+    def part_key(self, part: Any) -> Optional[str]:
+        """Key of a part created by this cache, None for other objects"""
+        try:
+            return self._keys.get(part)
+        except TypeError:  # not weak referenceable
+            return None
+
+    def mate(self, key: str, selector: str, query: Callable[[], Mate]) -> Mate:
+        """
+        Mate of a cached part for a selector, queried only once
+        :param key: key of the part, see part_key
+        :param selector: the selector relative to the part, e.g. "?mate" or "@faces@>Z"
+        :param query: function creating the mate if it is not cached
+        :return: Mate
+        """
+        meta = self._meta(key)
+        frame = meta.get("mates", {}).get(selector) if meta is not None else None
+        if frame is not None:
+            self.hits += 1
+            return Mate(Vector(*frame[0]), Vector(*frame[1]), Vector(*frame[2]))
+
+        self.misses += 1
+        mate = query()
+        if meta is not None:
+            meta.setdefault("mates", {})[selector] = [
+                mate.origin.toTuple(),
+                mate.x_dir.toTuple(),
+                mate.z_dir.toTuple(),
+            ]
+            self._write(f"{key}.json", json.dumps(meta).encode())
+        return mate
+
+    def clear(self):
+        """Remove all entries"""
+        for name in self._entries():
+            os.remove(os.path.join(self.directory, name))
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _entries(self) -> List[str]:
+        return [name for name in os.listdir(self.directory) if name.endswith((".brep", ".json"))]
+
+    def _meta(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(f"{key}.json")) as fd:
+                return json.load(fd)
+        except (OSError, ValueError):
+            return None
+
+    def _load(self, key: str) -> Optional[Part]:
+        meta = self._meta(key)
+        if meta is None:
+            return None
+        try:
+            with open(self._path(f"{key}.brep"), "rb") as fd:
+                shape = _from_brep(fd.read())
+        except (OSError, ValueError):
+            return None
+
+        os.utime(self._path(f"{key}.json"))  # mark as recently used for the eviction
+
+        if meta["kind"] == "shape":
+            return shape
+
+        # the main objects first, then one compound per tag (see _store)
+        shapes = list(shape) if meta["compound"] else [shape]
+        counts = meta["counts"]
+        part = Workplane().newObject(shapes[: counts[0]])
+        for (tag, count), start in zip(meta["tags"], _offsets(counts)):
+            tagged = part.newObject(shapes[start : start + count])
+            tagged._tag = tag
+            part.ctx.tags[tag] = tagged
+        return part
+
+    def _store(self, key: str, part: Part):
+        if isinstance(part, Workplane):
+            groups: List[Tuple[str, List[Shape]]] = [("", _shapes(part))]
+            groups += [(tag, _shapes(tagged)) for tag, tagged in part.ctx.tags.items() if _shapes(tagged)]
+            shapes = [shape for _, group in groups for shape in group]
+            meta = {
+                "kind": "workplane",
+                "compound": len(shapes) > 1,
+                "counts": [len(group) for _, group in groups],
+                "tags": [[tag, len(group)] for tag, group in groups[1:]],
+            }
+        elif isinstance(part, Shape):
+            shapes = [part]
+            meta = {"kind": "shape"}
+        else:
+            return  # nothing to cache
+
+        if not shapes:
+            return
+        self._write(f"{key}.brep", _to_brep(shapes))
+        self._write(f"{key}.json", json.dumps(meta).encode())
+        self._evict()
+
+    def _write(self, name: str, data: bytes):
+        # write to a temporary file first, so that concurrent runs never read partial files
+        tmp = f"{self._path(name)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fd:
+            fd.write(data)
+        os.replace(tmp, self._path(name))
+
+    def _evict(self):
+        # brep and json of a key are evicted together, the json file carries the time of the last use
+        entries: Dict[str, List] = {}
+        for name in self._entries():
+            stat = os.stat(self._path(name))
+            entry = entries.setdefault(os.path.splitext(name)[0], [0.0, 0])
+            entry[0] = max(entry[0], stat.st_mtime)
+            entry[1] += stat.st_size
+        total = sum(size for _, size in entries.values())
+        for key, (_, size) in sorted(entries.items(), key=lambda item: item[1][0]):
+            if total <= self.max_size:
+                break
+            for name in (f"{key}.brep", f"{key}.json"):
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            total -= size
+
+
+def _offsets(counts: List[int]) -> List[int]:
+    result, start = [], counts[0]
+    for count in counts[1:]:
+        result.append(start)
+        start += count
+    return result
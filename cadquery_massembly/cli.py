@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import runpy
+import sys
+import time
+import traceback
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class Recorder:
+    def __init__(self):
+        """Stand-in for the show_object function of CQ-Editor that records all shown objects"""
+        self.objects: List[Dict] = []
+
+    def show_object(self, obj, name: Optional[str] = None, options: Optional[Dict] = None, **kwargs):
+        self.objects.append({"obj": obj, "name": name or f"object_{len(self.objects)}", "options": options})
+
+    def debug(self, obj, name: Optional[str] = None, **kwargs):
+        pass
+
+    def assembly(self, name: Optional[str] = None):
+        """
+        The shown MAssembly with the given name or the last shown one
+        :param name: name the object was shown with
+        :return: MAssembly
+        """
+        from .massembly import MAssembly
+
+        candidates = [o for o in self.objects if isinstance(o["obj"], MAssembly)]
+        if name is not None:
+            candidates = [o for o in candidates if o["name"] == name]
+        if not candidates:
+            raise RuntimeError("No MAssembly shown" + ("" if name is None else f" with name '{name}'"))
+        return candidates[-1]["obj"]
+
+
+def _split(spec: str, option: str):
+    name, sep, value = spec.partition("=")
+    if not sep or not name:
+        raise ValueError(f"Expected NAME=VALUE for {option}, got '{spec}'")
+    return name, value
+
+
+def _joints(specs: Sequence[str]):
+    from .massembly import DOF
+
+    joints = {}
+    for spec in specs:
+        name, value = _split(spec, "--joint")
+        parts = value.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"Expected NAME=MATE:TARGET:DOF for --joint, got '{spec}'")
+        joints[name] = DOF(*parts)
+    return joints
+
+
+def _sweep(specs: Sequence[str]) -> Dict[str, np.ndarray]:
+    sweep = {}
+    for spec in specs:
+        name, value = _split(spec, "--sweep")
+        start, stop, num = value.split(":")
+        sweep[name] = np.linspace(float(start), float(stop), int(num))
+    lengths = {len(values) for values in sweep.values()}
+    if len(lengths) > 1:
+        raise ValueError("All sweeps need the same number of frames")
+    return sweep
+
+
+def _output(pattern: Optional[str], script: str) -> Optional[str]:
+    # allow one output file per script, e.g. "out/{stem}.glb"
+    if pattern is None:
+        return None
+    return pattern.format(stem=os.path.splitext(os.path.basename(script))[0])
+
+
+def run_script(script: str, args: argparse.Namespace) -> Dict:
+    """
+    Execute an assembly script headlessly and process the shown assembly
+    :param script: path of the script
+    :param args: parsed command line arguments
+    :return: summary dict with timings (seconds) and outputs
+    """
+    summary: Dict = {"script": script, "timings": {}}
+    timings = summary["timings"]
+
+    recorder = Recorder()
+    init_globals = {"show_object": recorder.show_object, "debug": recorder.debug}
+    if args.assemble:
+        init_globals["check_mates"] = False
+
+    # like CQ-Editor, the script runs in its folder (relative data files) and can import modules next to it
+    path = os.path.abspath(script)
+    cwd = os.getcwd()
+    sys.path.insert(0, os.path.dirname(path))
+    os.chdir(os.path.dirname(path))
+    try:
+        start = time.perf_counter()
+        runpy.run_path(path, init_globals=init_globals)
+        timings["script"] = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+        sys.path.pop(0)
+    summary["shown"] = [o["name"] for o in recorder.objects]
+
+    needs_assembly = args.export or args.program or args.sweep or args.residuals
+    if not needs_assembly:
+        return summary
+
+    assy = recorder.assembly(args.object)
+    summary["assembly"] = assy.name
+    summary["nodes"] = len(assy.objects)
+    summary["mates"] = len(assy.mates)
+
+    if args.residuals:
+        residuals = assy.residuals()
+        summary["residuals"] = residuals.max()
+
+    export = _output(args.export, script)
+    if export is not None:
+        start = time.perf_counter()
+        assy.flatten().save(export)
+        timings["export"] = time.perf_counter() - start
+        summary["export"] = export
+
+    if args.program or args.sweep:
+        start = time.perf_counter()
+        program = assy.compile(_joints(args.joint))
+        timings["compile"] = time.perf_counter() - start
+
+        program_file = _output(args.program, script)
+        if program_file is not None:
+            program.save(program_file)
+            summary["program"] = program_file
+
+        if args.sweep:
+            sweep = _sweep(args.sweep)
+            start = time.perf_counter()
+            pose = program.solve(sweep)
+            timings["sweep"] = time.perf_counter() - start
+            summary["frames"] = len(pose.locs)
+            summary["infeasible"] = int(np.isnan(pose.locs).any(axis=(1, 2, 3)).sum())
+
+            frames = _output(args.frames, script)
+            if frames is not None:
+                from .framestore import FrameStore
+
+                with FrameStore.create(frames, program.nodes, capacity=len(pose.locs)) as store:
+                    store.append(pose)
+                summary["frame_store"] = frames
+
+            trajectories = _output(args.trajectories, script)
+            if trajectories is not None:
+                np.savez(trajectories, **program.trajectories(sweep))
+                summary["trajectories"] = trajectories
+
+    return summary
+
+
+def _print(summary: Dict):
+    print(summary["script"])
+    for key, value in summary.items():
+        if key == "timings":
+            for phase, seconds in value.items():
+                print(f"  time {phase:10s}: {seconds:8.3f}s")
+        elif key not in ("script", "error"):
+            print(f"  {key:15s}: {value}")
+    if "error" in summary:
+        print(summary["error"], end="")
+
+
+def parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="cadquery-massembly",
+        description="Run MAssembly scripts without CQ-Editor. show_object calls are recorded, the (last) shown "
+        "MAssembly can be exported, compiled and swept. Scripts run in their folder, output file names are relative "
+        "to the current folder and may contain {stem}, the name of the script.",
+    )
+    p.add_argument("scripts", nargs="+", help="assembly scripts to run")
+    p.add_argument(
+        "--assemble",
+        action="store_true",
+        help="preset check_mates = False, so that scripts reading it (like the examples) assemble instead of "
+        "showing the mates",
+    )
+    p.add_argument("--object", help="name of the shown MAssembly to process (default: the last shown one)")
+    p.add_argument("--export", help="write the assembly, the extension selects the format (.step, .glb, ...)")
+    p.add_argument("--residuals", action="store_true", help="report the largest mate residuals")
+    p.add_argument("--program", help="compile the assembly and save the program as JSON")
+    p.add_argument("--joint", action="append", default=[], help="joint for compile, NAME=MATE:TARGET:DOF")
+    p.add_argument("--sweep", action="append", default=[], help="sweep a joint, NAME=START:STOP:NUM")
+    p.add_argument("--frames", help="store the world locations of the sweep in a frame store")
+    p.add_argument("--trajectories", help="save the trajectories of the tracked points of the sweep (.npz)")
+    p.add_argument("--json", action="store_true", help="print one JSON summary per script")
+    p.add_argument("--fail-fast", action="store_true", help="stop at the first failing script")
+    return p
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parser().parse_args(argv)
+
+    failed = 0
+    for script in args.scripts:
+        try:
+            summary = run_script(script, args)
+        except Exception:
+            failed += 1
+            summary = {"script": script, "error": traceback.format_exc()}
+
+        if args.json:
+            print(json.dumps(summary, default=str))
+        else:
+            _print(summary)
+        sys.stdout.flush()
+
+        if failed and args.fail_fast:
+            break
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import product
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from cadquery import Assembly, Workplane, Shape, Vector
+from OCP.BRepAdaptor import BRepAdaptor_Surface
+
+from .mate import Mate
+
+KINDS = ("circle", "cylinder", "plane")
+
+_NEIGHBORS = np.array(list(product((-1, 0, 1), repeat=3)))
+
+
+@dataclass
+class Candidates:
+    paths: List[str]
+    nodes: np.ndarray  # (K,) index into paths
+    kinds: np.ndarray  # (K,) index into KINDS
+    origins: np.ndarray  # (K, 3) in node coordinates
+    x_dirs: np.ndarray  # (K, 3) in node coordinates
+    z_dirs: np.ndarray  # (K, 3) in node coordinates
+    radii: np.ndarray  # (K,) 0 for planes
+    lengths: np.ndarray  # (K,) axial length of cylinders, 0 for circles and planes
+    world: np.ndarray  # (N, 4, 4) world locations of the nodes
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def world_frames(self):
+        """Origins and z directions in world coordinates"""
+        loc = self.world[self.nodes]
+        origins = (loc[:, :3, :3] @ self.origins[..., None])[..., 0] + loc[:, :3, 3]
+        z_dirs = (loc[:, :3, :3] @ self.z_dirs[..., None])[..., 0]
+        return origins, z_dirs
+
+
+@dataclass
+class MatePair:
+    id1: str
+    mate1: Mate
+    id2: str
+    mate2: Mate
+    kind: str
+    distance: float
+
+
+def _features(shape: Shape, kinds: Sequence[str]):
+    if "circle" in kinds:
+        for edge in shape.Edges():
+            if edge.geomType() == "CIRCLE":
+                mate = Mate(edge)
+                yield 0, mate.origin, mate.x_dir, mate.z_dir, edge.radius(), 0.0
+
+    for face in shape.Faces():
+        geom_type = face.geomType()
+        if geom_type == "CYLINDER" and "cylinder" in kinds:
+            surface = BRepAdaptor_Surface(face.wrapped)
+            cylinder = surface.Cylinder()
+            axis = cylinder.Axis()
+            z_dir = Vector(axis.Direction())
+            x_dir = Vector(cylinder.Position().XDirection())
+            # the v parameter of a cylinder is the distance along its axis, use the center of the axial extent
+            # of the face as origin
+            v1, v2 = surface.FirstVParameter(), surface.LastVParameter()
+            origin = Vector(axis.Location()) + z_dir * ((v1 + v2) / 2)
+            yield 1, origin, x_dir, z_dir, cylinder.Radius(), abs(v2 - v1)
+
+        elif geom_type == "PLANE" and "plane" in kinds:
+            mate = Mate(face)
+            yield 2, mate.origin, mate.x_dir, mate.z_dir, 0.0, 0.0
+
+
+def extract_candidates(nodes: Dict[str, Assembly], world: np.ndarray, kinds: Sequence[str] = KINDS) -> Candidates:
+    """
+    Extract candidate mate frames of all shapes into arrays
+    :param nodes: dict of path to node
+    :param world: array (N, 4, 4) of the world locations of the nodes
+    :param kinds: feature kinds to extract, any of "circle", "cylinder", "plane"
+    :return: Candidates
+    """
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise ValueError(f"Unknown kinds {sorted(unknown)}")
+
+    paths = list(nodes)
+    rows = []
+    cache: Dict[int, list] = {}  # features of objects shared by several nodes are only extracted once
+    for i, path in enumerate(paths):
+        obj = nodes[path].obj
+        if id(obj) not in cache:
+            shape = obj.val() if isinstance(obj, Workplane) else obj
+            cache[id(obj)] = (
+                [
+                    (kind, o.toTuple(), x.toTuple(), z.toTuple(), r, h)
+                    for kind, o, x, z, r, h in _features(shape, kinds)
+                ]
+                if isinstance(shape, Shape)
+                else []
+            )
+        rows.extend((i,) + feature for feature in cache[id(obj)])
+
+    columns = list(zip(*rows)) if rows else [[]] * 7
+    return Candidates(
+        paths=paths,
+        nodes=np.array(columns[0], dtype=np.int64),
+        kinds=np.array(columns[1], dtype=np.int64),
+        origins=np.array(columns[2], dtype=float).reshape(-1, 3),
+        x_dirs=np.array(columns[3], dtype=float).reshape(-1, 3),
+        z_dirs=np.array(columns[4], dtype=float).reshape(-1, 3),
+        radii=np.array(columns[5], dtype=float),
+        lengths=np.array(columns[6], dtype=float),
+        world=np.asarray(world, dtype=float),
+    )
+
+
+def match_candidates(candidates: Candidates, tol: float = 1e-3, angle_tol: float = 1e-3) -> np.ndarray:
+    """
+    Find pairs of candidates of different nodes with the same kind and radius in world coordinates: circles
+    with coinciding origins and parallel axes, cylinders on the same axis that overlap axially (e.g. a pin
+    longer than its hole) and planes with coinciding origins and opposite normals
+    :param candidates: the extracted candidates
+    :param tol: maximum distance of origins (of a cylinder origin to the other axis) and difference of radii
+    :param angle_tol: maximum angle between the axes in radians
+    :return: array (P, 2) of candidate indices
+    """
+    origins, z_dirs = candidates.world_frames()
+    # cylinders on the same axis share the foot of the perpendicular from the world origin to the axis
+    cylinders = candidates.kinds == 1
+    keys = np.array(origins)
+    keys[cylinders] -= np.sum(origins[cylinders] * z_dirs[cylinders], axis=1)[:, None] * z_dirs[cylinders]
+    cells = np.floor(keys / tol).astype(np.int64)
+    radius_keys = np.round(candidates.radii / tol).astype(np.int64)
+
+    # hash on kind and radius, then on the position grid cell
+    grid = defaultdict(list)
+    for i, key in enumerate(zip(candidates.kinds.tolist(), radius_keys.tolist(), map(tuple, cells.tolist()))):
+        grid[key].append(i)
+
+    first, second = [], []
+    for i, (kind, radius_key, cell) in enumerate(zip(candidates.kinds.tolist(), radius_keys.tolist(), cells)):
+        for dr in (-1, 0, 1):
+            for neighbor in map(tuple, (cell + _NEIGHBORS).tolist()):
+                for j in grid.get((kind, radius_key + dr, neighbor), ()):
+                    if j > i:
+                        first.append(i)
+                        second.append(j)
+
+    pairs = np.array((first, second), dtype=np.int64).reshape(2, -1).T
+    i, j = pairs[:, 0], pairs[:, 1]
+    dots = np.sum(z_dirs[i] * z_dirs[j], axis=1)
+    offsets = origins[j] - origins[i]
+    axial = np.sum(offsets * z_dirs[i], axis=1)
+    distances = np.where(
+        cylinders[i],
+        np.linalg.norm(offsets - axial[:, None] * z_dirs[i], axis=1),
+        np.linalg.norm(offsets, axis=1),
+    )
+    overlap = (candidates.lengths[i] + candidates.lengths[j]) / 2 - np.abs(axial)
+    keep = (
+        (candidates.nodes[i] != candidates.nodes[j])
+        & (distances <= tol)
+        & (~cylinders[i] | (overlap > tol))
+        & (np.abs(candidates.radii[i] - candidates.radii[j]) <= tol)
+        & (np.abs(dots) >= np.cos(angle_tol))
+        & ((candidates.kinds[i] != 2) | (dots < 0))
+    )
+    return pairs[keep]
+
+
+def propose_mates(candidates: Candidates, pairs: np.ndarray) -> List[MatePair]:
+    """
+    Create mates for matched candidate pairs. The second mate is the first one expressed in the coordinates
+    of the second node (moved to the origin of the second feature), so assembling them keeps the positions.
+    Mates of cylinders are placed on their axes at the center of the axial overlap
+    :param candidates: the extracted candidates
+    :param pairs: array (P, 2) of candidate indices as returned by match_candidates
+    :return: list of MatePair, ready to be added with MAssembly.mate(id, mate, name=...)
+    """
+    world = candidates.world
+    result = []
+    for i, j in pairs.tolist():
+        n1, n2 = candidates.nodes[i], candidates.nodes[j]
+        rot = world[n2, :3, :3].T @ world[n1, :3, :3]
+        origin1, origin2 = candidates.origins[i], candidates.origins[j]
+        w1 = world[n1, :3, :3] @ origin1 + world[n1, :3, 3]
+        w2 = world[n2, :3, :3] @ origin2 + world[n2, :3, 3]
+        offset = w2 - w1
+        if candidates.kinds[i] == 1:
+            z1 = world[n1, :3, :3] @ candidates.z_dirs[i]
+            z2 = world[n2, :3, :3] @ candidates.z_dirs[j]
+            axial = offset @ z1
+            h1, h2 = candidates.lengths[i] / 2, candidates.lengths[j] / 2
+            center = (max(-h1, axial - h2) + min(h1, axial + h2)) / 2  # along the first axis from origin1
+            origin1 = origin1 + center * candidates.z_dirs[i]
+            origin2 = origin2 + (center - axial) * np.sign(z1 @ z2) * candidates.z_dirs[j]
+            offset = offset - axial * z1
+        mate1 = Mate(Vector(*origin1), Vector(*candidates.x_dirs[i]), Vector(*candidates.z_dirs[i]))
+        mate2 = Mate(
+            Vector(*origin2),
+            Vector(*(rot @ candidates.x_dirs[i])),
+            Vector(*(rot @ candidates.z_dirs[i])),
+        )
+        result.append(
+            MatePair(
+                candidates.paths[n1],
+                mate1,
+                candidates.paths[n2],
+                mate2,
+                KINDS[candidates.kinds[i]],
+                float(np.linalg.norm(offset)),
+            )
+        )
+    return result
@@ -0,0 +1,148 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .tessellation import _to_brep
+
+if TYPE_CHECKING:
+    from .massembly import MAssembly
+
+SORT_KEYS = ("subtree", "own", "nodes", "mates")
+
+
+@dataclass
+class Footprint:
+    paths: np.ndarray  # (N,) fully qualified node paths, parents before children
+    parents: np.ndarray  # (N,) index of the parent node, -1 for the root
+    shape_index: np.ndarray  # (N,) index into the shape columns, -1 for nodes without object
+    mates: np.ndarray  # (N,) number of mates defined on the node
+    subtree_bytes: np.ndarray  # (N,) BRep bytes of the unique shape objects in the subtree of the node
+    subtree_nodes: np.ndarray  # (N,) number of nodes in the subtree including the node
+    subtree_mates: np.ndarray  # (N,) number of mates in the subtree
+    shape_bytes: np.ndarray  # (S,) BRep size of each unique shape object
+    shape_faces: np.ndarray  # (S,) number of faces of each unique shape object
+    shape_instances: np.ndarray  # (S,) number of nodes referencing the shape object
+    shape_digests: np.ndarray  # (S,) sha256 of the BRep, equal digests are identical copies
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __repr__(self):
+        return (
+            f"Footprint(nodes: {len(self)}, shapes: {len(self.shape_bytes)}, total: {self.total()} bytes, "
+            f"duplicated: {self.wasted()} bytes)"
+        )
+
+    def total(self) -> int:
+        """BRep bytes of all unique shape objects"""
+        return int(self.shape_bytes.sum())
+
+    def duplicates(self) -> List[List[int]]:
+        """
+        Groups of distinct shape objects with identical BRep, each group could be one shared object
+        :return: list of lists of shape indices, largest savings first
+        """
+        groups: Dict[str, List[int]] = {}
+        for i, digest in enumerate(self.shape_digests.tolist()):
+            groups.setdefault(digest, []).append(i)
+        result = [group for group in groups.values() if len(group) > 1]
+        return sorted(result, key=lambda group: -int(self.shape_bytes[group[1:]].sum()))
+
+    def wasted(self) -> int:
+        """BRep bytes that sharing the duplicated shape objects would save"""
+        return sum(int(self.shape_bytes[group[1:]].sum()) for group in self.duplicates())
+
+    def shape_paths(self, shape: int) -> List[str]:
+        """Paths of all nodes referencing a shape object"""
+        return self.paths[self.shape_index == shape].tolist()
+
+    def report(self, sort: str = "subtree", limit: Optional[int] = None) -> List[Tuple[str, int, int, int, int]]:
+        """
+        Nodes ordered by their footprint, largest first, e.g. hexapod.footprint().report(limit=10)
+        :param sort: "subtree" (BRep bytes of the subtree), "own" (BRep bytes of the node's shape), "nodes" or
+                     "mates" (counts in the subtree)
+        :param limit: number of rows to return (None: all)
+        :return: list of (path, own bytes, subtree bytes, subtree nodes, subtree mates)
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Cannot sort by '{sort}', use one of {SORT_KEYS}")
+
+        own = np.zeros(len(self), dtype=np.int64)
+        has_shape = self.shape_index >= 0
+        own[has_shape] = self.shape_bytes[self.shape_index[has_shape]]
+        key = {"subtree": self.subtree_bytes, "own": own, "nodes": self.subtree_nodes, "mates": self.subtree_mates}
+        order = np.argsort(-key[sort], kind="stable")[:limit]
+        return [
+            (
+                str(self.paths[i]),
+                int(own[i]),
+                int(self.subtree_bytes[i]),
+                int(self.subtree_nodes[i]),
+                int(self.subtree_mates[i]),
+            )
+            for i in order.tolist()
+        ]
+
+
+def footprint(assembly: "MAssembly") -> Footprint:
+    """
+    Measure the memory footprint of an assembly, see MAssembly.footprint
+    :param assembly: the (root) assembly
+    :return: Footprint
+    """
+    from .massembly import _to_shape
+
+    nodes = assembly._nodes()
+    paths = {id(node): path for path, node in assembly.objects.items()}
+    index = {id(node): i for i, node in enumerate(nodes)}
+    parents = np.array([index.get(id(node.parent), -1) for node in nodes], dtype=np.int64)
+
+    mates = np.zeros(len(nodes), dtype=np.int64)
+    for mate_def in assembly.mates.values():
+        mates[index[id(mate_def.assembly)]] += 1
+
+    # every shape object is serialized once, however often it is referenced
+    shape_ids: Dict[int, int] = {}
+    shape_index = np.full(len(nodes), -1, dtype=np.int64)
+    shape_bytes, shape_faces, shape_digests = [], [], []
+    for i, node in enumerate(nodes):
+        if node.obj is None:
+            continue
+        if id(node.obj) not in shape_ids:
+            shape = _to_shape(node.obj)
+            brep = _to_brep(shape)
+            shape_ids[id(node.obj)] = len(shape_bytes)
+            shape_bytes.append(len(brep))
+            shape_faces.append(len(shape.Faces()))
+            shape_digests.append(hashlib.sha256(brep).hexdigest())
+        shape_index[i] = shape_ids[id(node.obj)]
+
+    shape_bytes = np.array(shape_bytes, dtype=np.int64)
+    shape_instances = np.bincount(shape_index[shape_index >= 0], minlength=len(shape_bytes))
+
+    # children after parents, so a reverse pass accumulates the subtrees
+    subtree_shapes = [set() if s < 0 else {s} for s in shape_index.tolist()]
+    subtree_nodes = np.ones(len(nodes), dtype=np.int64)
+    subtree_mates = mates.copy()
+    for i in range(len(nodes) - 1, 0, -1):
+        parent = parents[i]
+        subtree_shapes[parent] |= subtree_shapes[i]
+        subtree_nodes[parent] += subtree_nodes[i]
+        subtree_mates[parent] += subtree_mates[i]
+    subtree_bytes = np.array([int(shape_bytes[list(s)].sum()) for s in subtree_shapes], dtype=np.int64)
+
+    return Footprint(
+        paths=np.array([paths[id(node)] for node in nodes], dtype=str),
+        parents=parents,
+        shape_index=shape_index,
+        mates=mates,
+        subtree_bytes=subtree_bytes,
+        subtree_nodes=subtree_nodes,
+        subtree_mates=subtree_mates,
+        shape_bytes=shape_bytes,
+        shape_faces=np.array(shape_faces, dtype=np.int64),
+        shape_instances=shape_instances,
+        shape_digests=np.array(shape_digests, dtype=str),
+    )
@@ -0,0 +1,163 @@
+import json
+import struct
+from typing import List, Sequence, Union
+
+import numpy as np
+
+from .kinematics import Pose
+
+MAGIC = b"MASSFRM1"
+FORMAT_VERSION = 1
+
+# magic, frame count, header length. The count is updated in place after each append
+_PREFIX = struct.Struct("<8sQI")
+_ALIGN = 64
+
+
+class FrameStore:
+    def __init__(self, filename: str, mode: str = "r"):
+        """
+        Per frame world transformations of all nodes in a memory mapped file. Use FrameStore.create to
+        create a new store, the constructor opens an existing one
+        :param filename: name of the store file
+        :param mode: "r" (read only, e.g. in other processes) or "r+" (append)
+        """
+        if mode not in ("r", "r+"):
+            raise ValueError(f"Unsupported mode '{mode}', use 'r' or 'r+'")
+
+        self.filename = filename
+        self.mode = mode
+        with open(filename, "rb") as fd:
+            magic, count, length = _PREFIX.unpack(fd.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{filename} is not a frame store")
+            header = json.loads(fd.read(length))
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported format version {header['version']}")
+
+        self.nodes: List[str] = header["nodes"]
+        self.dtype = np.dtype(header["dtype"])
+        self._count = count
+        self._offset = _data_offset(length)
+        # the file grows when it is full, so the capacity is derived from its size
+        self.capacity = (self._file_size() - self._offset) // self._frame_size()
+        self._counter = np.memmap(filename, dtype="<u8", mode=mode, offset=8, shape=(1,))
+        self._data = self._map()
+
+    @classmethod
+    def create(
+        cls, filename: str, nodes: Sequence[str], capacity: int = 1024, dtype: Union[str, np.dtype] = "<f4"
+    ) -> "FrameStore":
+        """
+        Create a new (overwrite an existing) store and open it for appending
+        :param filename: name of the store file
+        :param nodes: paths of the nodes, e.g. program.nodes
+        :param capacity: number of preallocated frames, the file grows when it is full
+        :param dtype: dtype of the stored transformations
+        :return: FrameStore
+        """
+        header = json.dumps({"version": FORMAT_VERSION, "nodes": list(nodes), "dtype": np.dtype(dtype).str}).encode()
+        offset = _data_offset(len(header))
+        with open(filename, "wb") as fd:
+            fd.write(_PREFIX.pack(MAGIC, 0, len(header)))
+            fd.write(header)
+            fd.truncate(offset + capacity * len(nodes) * 12 * np.dtype(dtype).itemsize)
+        return cls(filename, mode="r+")
+
+    def __repr__(self):
+        return f"FrameStore('{self.filename}', frames: {len(self)}, nodes: {len(self.nodes)}, dtype: {self.dtype})"
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> np.ndarray:
+        """
+        World transformations of one or more frames, e.g. store[1000:2000:10]
+        :param index: frame index, slice or index array
+        :return: array (N, 4, 4) for an integer index, else (K, N, 4, 4)
+        """
+        data = self.transforms[index]
+        result = np.zeros(data.shape[:-2] + (4, 4))
+        result[..., :3, :] = data
+        result[..., 3, 3] = 1
+        return result
+
+    @property
+    def transforms(self) -> np.ndarray:
+        """Read only view (frames, N, 3, 4) of the stored frames without copying"""
+        view = self._data[: self._count]
+        view.flags.writeable = False
+        return view
+
+    def append(self, frames: Union[Pose, np.ndarray]) -> int:
+        """
+        Append one or a batch of frames
+        :param frames: a (batched) pose or array (..., N, 4, 4) of world transformations
+        :return: index of the first appended frame
+        """
+        if self.mode != "r+":
+            raise RuntimeError("Frame store is opened read only")
+
+        world = frames.world() if isinstance(frames, Pose) else np.asarray(frames)
+        if world.shape[-3:] != (len(self.nodes), 4, 4):
+            raise ValueError(f"Expected frames of shape (..., {len(self.nodes)}, 4, 4), got {world.shape}")
+        world = world.reshape(-1, len(self.nodes), 4, 4)
+
+        start = self._count
+        if start + len(world) > self.capacity:
+            self._grow(max(2 * self.capacity, start + len(world)))
+
+        self._data[start : start + len(world)] = world[:, :, :3, :]
+        # publish the frames only after they are written
+        self._count = self._counter[0] = start + len(world)
+        return start
+
+    def refresh(self) -> int:
+        """
+        Pick up frames appended by another process
+        :return: number of frames
+        """
+        self._count = int(self._counter[0])
+        if self._count > self.capacity:
+            self.capacity = (self._file_size() - self._offset) // self._frame_size()
+            self._data = self._map()
+        return self._count
+
+    def flush(self):
+        """Write all changes to disk"""
+        if self.mode == "r+":
+            self._data.flush()
+            self._counter.flush()
+
+    def close(self):
+        self.flush()
+        self._data = self._counter = None
+
+    def _frame_size(self) -> int:
+        return len(self.nodes) * 12 * self.dtype.itemsize
+
+    def _file_size(self) -> int:
+        with open(self.filename, "rb") as fd:
+            return fd.seek(0, 2)
+
+    def _map(self) -> np.ndarray:
+        shape = (self.capacity, len(self.nodes), 3, 4)
+        return np.memmap(self.filename, dtype=self.dtype, mode=self.mode, offset=self._offset, shape=shape)
+
+    def _grow(self, capacity: int):
+        self._data.flush()
+        with open(self.filename, "r+b") as fd:
+            fd.truncate(self._offset + capacity * self._frame_size())
+        self.capacity = capacity
+        self._data = self._map()
+
+
+def _data_offset(header_length: int) -> int:
+    end = _PREFIX.size + header_length
+    return (end + _ALIGN - 1) // _ALIGN * _ALIGN
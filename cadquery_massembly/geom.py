@@ -1,4 +1,4 @@
-from math import pi
+from math import pi, atan2, sin, cos
 
 from cadquery import Plane, Vector, Workplane, Edge, Wire
 from OCP.gp import gp_Pnt, gp_Dir, gp_Ax2, gp_Ax1
@@ -105,6 +105,46 @@ class Circle(Plane):
         else:
             raise ValueError("Only Circle and Line allowed")
 
+    def intersect_near(self, circle, seed, tol=1e-6, max_iter=10):
+        """
+        Intersect with another circle by Gauss-Newton iteration starting at the points closest to seed
+        :param circle: the circle to intersect with
+        :param seed: a point close to the wanted intersection point, e.g. the solution of the last frame
+        :param tol: maximum distance of the found point to both circles
+        :param max_iter: maximum number of iterations
+        :return: tuple of the intersection point (None if not converged) and the number of iterations
+        """
+        t1 = self._param(seed)
+        t2 = circle._param(seed)
+        for i in range(max_iter + 1):
+            p1, d1 = self._point(t1)
+            p2, d2 = circle._point(t2)
+            r = p1 - p2
+            if r.Length < tol:
+                return p1, i
+            if i == max_iter:
+                break
+
+            # Solve the normal equations of J = [d1, -d2] for the angle updates
+            a11, a12, a22 = d1.dot(d1), -d1.dot(d2), d2.dot(d2)
+            b1, b2 = -d1.dot(r), d2.dot(r)
+            det = a11 * a22 - a12 * a12
+            if abs(det) < 1e-12:  # tangent circles
+                break
+            t1 += (a22 * b1 - a12 * b2) / det
+            t2 += (a11 * b2 - a12 * b1) / det
+
+        return None, i
+
+    def _param(self, point):
+        v = Vector(point) - self.origin
+        return atan2(v.dot(self.yDir), v.dot(self.xDir))
+
+    def _point(self, t):
+        point = self.origin + self.xDir * (self.radius * cos(t)) + self.yDir * (self.radius * sin(t))
+        derivative = self.xDir * (-self.radius * sin(t)) + self.yDir * (self.radius * cos(t))
+        return point, derivative
+
     def local_angle(self, p1, p2):
         return (p1 - self.origin).wrapped.AngleWithRef((p2 - self.origin).wrapped, self.zDir.wrapped) / pi * 180
 
@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from cadquery import Assembly, Color, Location, Shape
+
+
+@dataclass
+class InstanceTable:
+    shapes: List[Shape]  # unique shapes
+    shape_index: np.ndarray  # (N,) index into shapes per instance
+    transforms: np.ndarray  # (N, 4, 4) world transformations
+    colors: np.ndarray  # (N, 4) rgba, nan if neither the node nor a parent has a color
+    paths: np.ndarray  # (N,) fully qualified paths, e.g. "hexapod/right_back/lower"
+
+    def __len__(self):
+        return len(self.shape_index)
+
+    def __repr__(self):
+        return f"InstanceTable(instances: {len(self)}, shapes: {len(self.shapes)})"
+
+    def to_assembly(self, name: str = "instances") -> Assembly:
+        """
+        Create a flat cadquery assembly where all instances of a shape reference the same shape object,
+        so that e.g. STEP or glTF exports can write the geometry once and instantiate it. Instances are named
+        "{index}_{path}" with "/" replaced by "_", the index keeps e.g. "a_b" and "a/b" apart
+        :param name: name of the assembly
+        :return: Assembly
+        """
+        from .massembly import _matrix_to_loc
+
+        assy = Assembly(name=name)
+        for i, path in enumerate(self.paths):
+            color = None if np.isnan(self.colors[i, 0]) else Color(*self.colors[i])
+            assy.add(
+                self.shapes[self.shape_index[i]],
+                name=f"{i}_{path}".replace("/", "_"),
+                loc=_matrix_to_loc(self.transforms[i]),
+                color=color,
+            )
+        return assy
+
+    def save(self, filename: str):
+        """
+        Write the instances, e.g. as STEP or glTF file (see cadquery.Assembly.export)
+        :param filename: name of the file, the extension determines the format
+        """
+        self.to_assembly().export(filename)
@@ -0,0 +1,172 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from .mate import Mate
+
+if TYPE_CHECKING:
+    from .massembly import MAssembly
+
+
+@dataclass(eq=False)
+class Entry:
+    label: str
+    parent: Optional["Entry"] = None
+    # id(node) -> [node, (loc, obj) before, (loc, obj) after]. Locations and shapes are replaced, not modified
+    # in place, hence they are referenced and not copied
+    nodes: Dict[int, List] = field(default_factory=dict)
+    mates: Dict[str, List[Optional[Mate]]] = field(default_factory=dict)  # name -> [mate before, mate after]
+    # assemble records before and after the change. Records are replaced and not modified in place, hence
+    # the lists are shallow copies
+    steps: List = field(default_factory=list)
+    new_steps: List = field(default_factory=list)
+    children: List["Entry"] = field(default_factory=list)
+
+    def __repr__(self):
+        return f"Entry('{self.label}', nodes: {len(self.nodes)}, mates: {len(self.mates)})"
+
+
+class Journal:
+    def __init__(self, assembly: "MAssembly"):
+        """
+        Tree of changes of node locations, mate frames and assemble records. Each entry only keeps the
+        nodes and mates changed by one operation. Undoing and then changing the assembly starts a new branch,
+        named checkpoints can be restored across branches.
+        :param assembly: the journaled (root) assembly
+        """
+        self.assembly = assembly
+        self.root = Entry("start")
+        self.head = self.root
+        self.checkpoints: Dict[str, Entry] = {}
+        self._pending: Optional[Entry] = None
+        self._depth = 0
+
+    def __repr__(self):
+        return f"Journal(head: {self.head}, checkpoints: {list(self.checkpoints)})"
+
+    def begin(self, label: str):
+        """Start recording an operation (nested operations are recorded as part of the outermost one)"""
+        self._depth += 1
+        if self._depth == 1:
+            self._pending = Entry(label, steps=list(self.assembly._steps))
+
+    def touch_node(self, node: "MAssembly"):
+        """Remember the state of a node before it is changed"""
+        if self._pending is not None and id(node) not in self._pending.nodes:
+            self._pending.nodes[id(node)] = [node, (node.loc, node.obj), None]
+
+    def touch_mate(self, name: str):
+        """Remember the frame of a mate before it is changed"""
+        if self._pending is not None and name not in self._pending.mates:
+            self._pending.mates[name] = [self.assembly.mates[name]._read_mate().copy(), None]
+
+    def commit(self) -> Optional[Entry]:
+        """
+        Finish recording an operation
+        :return: the new entry, None for nested operations or if nothing changed
+        """
+        self._depth -= 1
+        if self._depth > 0:
+            return None
+
+        entry, self._pending = self._pending, None
+        for record in entry.nodes.values():
+            record[2] = (record[0].loc, record[0].obj)
+        for name, record in entry.mates.items():
+            record[1] = self.assembly.mates[name]._read_mate().copy()
+        entry.new_steps = list(self.assembly._steps)
+
+        if not (entry.nodes or entry.mates or _changed(entry.steps, entry.new_steps)):
+            return None
+
+        entry.parent = self.head
+        self.head.children.append(entry)
+        self.head = entry
+        return entry
+
+    def undo(self) -> Entry:
+        """
+        Revert the last change
+        :return: the reverted entry
+        """
+        if self.head is self.root:
+            raise RuntimeError("Nothing to undo")
+        entry = self.head
+        self._revert(entry)
+        self.head = entry.parent
+        return entry
+
+    def redo(self) -> Entry:
+        """
+        Reapply the most recently undone change (of the latest branch)
+        :return: the reapplied entry
+        """
+        if not self.head.children:
+            raise RuntimeError("Nothing to redo")
+        entry = self.head.children[-1]
+        self._replay(entry)
+        self.head = entry
+        return entry
+
+    def checkpoint(self, name: str):
+        """Name the current state"""
+        self.checkpoints[name] = self.head
+
+    def restore(self, name: str) -> List[Entry]:
+        """
+        Go to a named state, possibly on another branch: undo up to the common ancestor, then redo down to it
+        :param name: name of the checkpoint
+        :return: the reverted and reapplied entries
+        """
+        if name not in self.checkpoints:
+            raise ValueError(f"Unknown checkpoint '{name}'")
+
+        target = self.checkpoints[name]
+        path = self._path(target)
+        ancestors = {id(entry) for entry in path}
+        entries = []
+        while id(self.head) not in ancestors:
+            entries.append(self.undo())
+        for entry in path[path.index(self.head) + 1 :]:
+            self._replay(entry)
+            self.head = entry
+            entries.append(entry)
+        return entries
+
+    def _path(self, entry: Entry) -> List[Entry]:
+        path = []
+        while entry is not None:
+            path.append(entry)
+            entry = entry.parent
+        return path[::-1]
+
+    def _revert(self, entry: Entry):
+        self._set_nodes(entry, 1, 2)
+        for name, (before, _) in entry.mates.items():
+            self.assembly.mates[name].mate = before.copy()
+        self.assembly._steps[:] = entry.steps
+
+    def _replay(self, entry: Entry):
+        self._set_nodes(entry, 2, 1)
+        for name, (_, after) in entry.mates.items():
+            self.assembly.mates[name].mate = after.copy()
+        self.assembly._steps[:] = entry.new_steps
+
+    def _set_nodes(self, entry: Entry, state: int, other: int):
+        # Only shapes changed by the operation itself (i.e. relocate) are set. Otherwise the shape the node had
+        # at that time would come back, e.g. a proxy of preview, which is not journaled
+        records = [
+            (record[0], record[state], record[state][1] is not record[other][1]) for record in entry.nodes.values()
+        ]
+        if any(shape_changed and node._full_obj is not None for node, _, shape_changed in records):
+            raise RuntimeError(
+                f"Restore the full geometry with preview(None) before undoing or redoing '{entry.label}'"
+            )
+
+        for node, (loc, obj), shape_changed in records:
+            node.loc = loc
+            if shape_changed:
+                node.obj = obj
+
+
+def _changed(steps: List, new_steps: List) -> bool:
+    return len(steps) != len(new_steps) or any(a is not b for a, b in zip(steps, new_steps))
@@ -0,0 +1,821 @@
+import json
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Op codes of a compiled assembly sequence, see MAssembly.compile
+PLACE, SET, TURN, CROSS, ALIGN = range(5)
+
+DOFS = ("rx", "ry", "rz", "tx", "ty", "tz")
+
+Op = Tuple[int, ...]
+
+
+def _inv(m: np.ndarray) -> np.ndarray:
+    """Invert a (batch of) rigid transformation(s)"""
+    r = np.swapaxes(m[..., :3, :3], -1, -2)
+    result = np.zeros_like(m)
+    result[..., :3, :3] = r
+    result[..., :3, 3] = -(r @ m[..., :3, 3, None])[..., 0]
+    result[..., 3, 3] = 1
+    return result
+
+
+def _joint(dof: int, value: np.ndarray) -> np.ndarray:
+    """Transformation of a single degree of freedom (angles in degrees)"""
+    value = np.asarray(value)
+    m = np.zeros(value.shape + (4, 4), dtype=np.result_type(value, float))
+    m[..., 0, 0] = m[..., 1, 1] = m[..., 2, 2] = m[..., 3, 3] = 1
+    if dof < 3:
+        a = np.deg2rad(value)
+        c, s = np.cos(a), np.sin(a)
+        i, j = ((1, 2), (2, 0), (0, 1))[dof]
+        m[..., i, i] = c
+        m[..., j, j] = c
+        m[..., i, j] = -s
+        m[..., j, i] = s
+    else:
+        m[..., dof - 3, 3] = value
+    return m
+
+
+def _dot(v1: np.ndarray, v2: np.ndarray) -> np.ndarray:
+    return np.sum(v1 * v2, axis=-1)
+
+
+def _norm(v: np.ndarray) -> np.ndarray:
+    return np.sqrt(_dot(v, v))
+
+
+def _angle_with_ref(v1: np.ndarray, v2: np.ndarray, ref: np.ndarray) -> np.ndarray:
+    """Signed angle in degrees from v1 to v2, positive if (v1 x v2) points towards ref (like gp_Vec.AngleWithRef)"""
+    cross = np.cross(v1, v2)
+    angle = np.arctan2(_norm(cross), _dot(v1, v2))
+    return np.rad2deg(np.where(np.real(_dot(cross, ref)) < 0, -angle, angle))
+
+
+def _axis_point(point: np.ndarray, frame: np.ndarray) -> np.ndarray:
+    """Project point onto the z axis of frame"""
+    origin, z_dir = frame[..., :3, 3], frame[..., :3, 2]
+    return _dot(point - origin, z_dir)[..., None] * z_dir + origin
+
+
+# Forward mode derivatives: each function takes values and their tangents and returns both. Tangents have one
+# leading axis more than the values (one row per joint), so that all joints are differentiated in one pass
+
+
+def _d_mul(a: np.ndarray, da: np.ndarray, b: np.ndarray, db: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    return a @ b, da @ b + a @ db
+
+
+def _d_inv(m: np.ndarray, dm: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    inv = _inv(m)
+    return inv, -(inv @ dm @ inv)
+
+
+def _d_joint(dof: int, value: np.ndarray, dvalue: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    derivative = np.zeros(np.shape(value) + (4, 4))
+    if dof < 3:
+        a = np.deg2rad(value)
+        c, s = np.cos(a) * np.pi / 180, np.sin(a) * np.pi / 180
+        i, j = ((1, 2), (2, 0), (0, 1))[dof]
+        derivative[..., i, i] = -s
+        derivative[..., j, j] = -s
+        derivative[..., i, j] = -c
+        derivative[..., j, i] = c
+    else:
+        derivative[..., dof - 3, 3] = 1
+    return _joint(dof, value), derivative * dvalue[..., None, None]
+
+
+def _d_dot(v1: np.ndarray, dv1: np.ndarray, v2: np.ndarray, dv2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    return _dot(v1, v2), _dot(dv1, v2) + _dot(v1, dv2)
+
+
+def _d_norm(v: np.ndarray, dv: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    norm = _norm(v)
+    return norm, _dot(v, dv) / norm
+
+
+def _d_cross(v1: np.ndarray, dv1: np.ndarray, v2: np.ndarray, dv2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    return np.cross(v1, v2), np.cross(dv1, v2) + np.cross(v1, dv2)
+
+
+def _d_angle_with_ref(
+    v1: np.ndarray, dv1: np.ndarray, v2: np.ndarray, dv2: np.ndarray, ref: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    cross, dcross = _d_cross(v1, dv1, v2, dv2)
+    x, dx = _d_dot(v1, dv1, v2, dv2)
+    norm = _norm(cross)
+    sign = np.where(_dot(cross, ref) < 0, -1.0, 1.0)
+    # y = sign * |cross| changes along the signed direction of cross. For parallel vectors this direction is
+    # undefined, but then v1 and v2 are perpendicular to the reference axis in all uses, so cross moves along it
+    with np.errstate(invalid="ignore", divide="ignore"):
+        direction = np.where((norm > 1e-12)[..., None], (sign / norm)[..., None] * cross, ref)
+    y, dy = sign * norm, _dot(dcross, direction)
+    return _angle_with_ref(v1, v2, ref), np.rad2deg((x * dy - y * dx) / (x**2 + y**2))
+
+
+def _d_axis_point(
+    point: np.ndarray, dpoint: np.ndarray, frame: np.ndarray, dframe: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    origin, z_dir = frame[..., :3, 3], frame[..., :3, 2]
+    dorigin, dz_dir = dframe[..., :3, 3], dframe[..., :3, 2]
+    k, dk = _d_dot(point - origin, dpoint - dorigin, z_dir, dz_dir)
+    return k[..., None] * z_dir + origin, dk[..., None] * z_dir + k[..., None] * dz_dir + dorigin
+
+
+class Program:
+    def __init__(
+        self,
+        nodes: Sequence[str],
+        parents: Sequence[int],
+        locs: np.ndarray,
+        mate_names: Sequence[str],
+        mate_nodes: Sequence[int],
+        mates: np.ndarray,
+        constants: np.ndarray,
+        ops: Sequence[Op],
+        joints: Sequence[str] = (),
+        pairs: Sequence[Tuple[int, int]] = (),
+        trackers: Sequence[str] = (),
+        tracker_nodes: Sequence[int] = (),
+        tracker_points: np.ndarray = (),
+        couplings: Sequence[Tuple[int, int, float, float]] = (),
+    ):
+        """
+        A flat kinematic program over integer node and mate indices
+        :param nodes: paths of all nodes, parents before children
+        :param parents: index of the parent of each node (-1 for the root)
+        :param locs: (N,4,4) array of the initial local node locations
+        :param mate_names: names of all mates
+        :param mate_nodes: index of the node of each mate
+        :param mates: (M,4,4) array of the mate frames relative to their node
+        :param constants: (K,4,4) array of fixed target locations
+        :param ops: list of op tuples (op code followed by integer arguments)
+        :param joints: names of the joint parameters
+        :param pairs: (object mate, target mate) indices of all assembled mate pairs that should coincide
+        :param trackers: names of the tracked points
+        :param tracker_nodes: index of the node of each tracked point
+        :param tracker_points: (T,3) array of the tracked points relative to their node
+        :param couplings: (joint, source joint, ratio, offset) of all coupled joints in evaluation order. The value
+                          of a coupled joint is ratio * value of the source joint + offset
+        """
+        self.nodes = list(nodes)
+        self.parents = np.array(parents, dtype=np.int64)
+        self.locs = np.array(locs, dtype=float).reshape(-1, 4, 4)
+        self.mate_names = list(mate_names)
+        self.mate_nodes = np.array(mate_nodes, dtype=np.int64)
+        self.mates = np.array(mates, dtype=float).reshape(-1, 4, 4)
+        self.constants = np.array(constants, dtype=float).reshape(-1, 4, 4)
+        self.ops = [tuple(int(v) for v in op) for op in ops]
+        self.joints = list(joints)
+        self.pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        self.trackers = list(trackers)
+        self.tracker_nodes = np.array(tracker_nodes, dtype=np.int64)
+        self.tracker_points = np.array(tracker_points, dtype=float).reshape(-1, 3)
+        self.couplings = [(int(j), int(s), float(r), float(o)) for j, s, r, o in couplings]
+
+        # A program is shared read only by all poses solved with it
+        for array in (
+            self.parents,
+            self.locs,
+            self.mate_nodes,
+            self.mates,
+            self.constants,
+            self.pairs,
+            self.tracker_nodes,
+            self.tracker_points,
+        ):
+            array.setflags(write=False)
+
+        self._chains = []
+        for i, parent in enumerate(self.parents):
+            chain = [] if parent < 0 else self._chains[parent]
+            self._chains.append(chain + [i])
+
+        # chains of couplings are resolved to free joints, so all coupled joints are set in one expression
+        resolved: Dict[int, Tuple[int, float, float]] = {}
+        for joint, source, ratio, offset in self.couplings:
+            if joint == source or joint in resolved:
+                raise ValueError(f"Joint {self.joints[joint]} is coupled more than once or to itself")
+            root, root_ratio, root_offset = resolved.get(source, (source, 1.0, 0.0))
+            resolved[joint] = (root, ratio * root_ratio, ratio * root_offset + offset)
+        if any(root in resolved for root, _, _ in resolved.values()):
+            raise ValueError("Couplings need to be ordered, sources before the joints coupled to them")
+        self._coupled = np.array(list(resolved), dtype=np.int64)
+        self._coupled_sources = np.array([source for source, _, _ in resolved.values()], dtype=np.int64)
+        self._coupled_ratios = np.array([ratio for _, ratio, _ in resolved.values()])
+        self._coupled_offsets = np.array([offset for _, _, offset in resolved.values()])
+
+        self._handlers = (self._place, self._set, self._turn, self._cross, self._align)
+
+    def __repr__(self):
+        return (
+            f"Program(nodes: {len(self.nodes)}, mates: {len(self.mate_names)}, ops: {len(self.ops)}, "
+            f"joints: {self.joints})"
+        )
+
+    def __getstate__(self):
+        # the handlers are bound methods and are recreated after unpickling, e.g. in worker processes
+        return {k: v for k, v in self.__dict__.items() if k != "_handlers"}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._handlers = (self._place, self._set, self._turn, self._cross, self._align)
+
+    def to_dict(self) -> Dict:
+        """
+        Export the kinematic description (nodes, mates, joints and op sequence) as JSON compatible dict
+        :return: dict
+        """
+        return {
+            "version": FORMAT_VERSION,
+            "nodes": self.nodes,
+            "parents": self.parents.tolist(),
+            "locs": self.locs.tolist(),
+            "mate_names": self.mate_names,
+            "mate_nodes": self.mate_nodes.tolist(),
+            "mates": self.mates.tolist(),
+            "constants": self.constants.tolist(),
+            "ops": [list(op) for op in self.ops],
+            "joints": self.joints,
+            "pairs": self.pairs.tolist(),
+            "trackers": self.trackers,
+            "tracker_nodes": self.tracker_nodes.tolist(),
+            "tracker_points": self.tracker_points.tolist(),
+            "couplings": [list(coupling) for coupling in self.couplings],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Program":
+        """
+        Create a program from an exported kinematic description
+        :param data: dict as created by to_dict
+        :return: Program
+        """
+        data = dict(data)
+        version = data.pop("version", FORMAT_VERSION)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported format version {version}")
+        return cls(**data)
+
+    def save(self, filename: str):
+        """
+        Save the kinematic description as JSON file
+        :param filename: name of the JSON file
+        """
+        with open(filename, "w") as fd:
+            json.dump(self.to_dict(), fd)
+
+    def joint_values(self, joints: Union[None, Dict[str, float], np.ndarray, Sequence[float]] = None) -> np.ndarray:
+        """
+        Convert joint parameters to an array. Coupled joints are calculated from their source joints, so they
+        cannot be set in a dict and their columns of an array are overwritten
+        :param joints: None (all zero), a dict of joint name to value (scalars or arrays) or an array (..., J)
+        :return: array of shape (..., J)
+        """
+        if joints is None:
+            values = np.zeros(len(self.joints))
+        elif isinstance(joints, dict):
+            unknown = set(joints) - set(self.joints)
+            if unknown:
+                raise ValueError(f"Unknown joints {sorted(unknown)}")
+            coupled = sorted(set(joints) & {self.joints[j] for j in self._coupled})
+            if coupled:
+                raise ValueError(f"Joints {coupled} are coupled and cannot be set")
+            values = np.broadcast_arrays(*[np.asarray(joints.get(name, 0.0), dtype=float) for name in self.joints])
+            values = np.stack(values, axis=-1) if values else np.zeros(0)
+        else:
+            values = np.asarray(joints, dtype=float)
+            if values.shape[-1:] != (len(self.joints),):
+                raise ValueError(f"Expected {len(self.joints)} joint values, got shape {values.shape}")
+
+        if len(self._coupled) > 0:
+            values = np.array(values)  # never write to the caller's array
+            values[..., self._coupled] = (
+                values[..., self._coupled_sources] * self._coupled_ratios + self._coupled_offsets
+            )
+        return values
+
+    def solve(
+        self, joints: Union[None, Dict[str, float], np.ndarray, Sequence[float]] = None, pose: "Pose" = None
+    ) -> "Pose":
+        """
+        Replay the program for the given joint parameters. The program is only read, all results are
+        written to the pose, so independent poses can be solved concurrently
+        :param joints: joint parameters, see joint_values. Leading dimensions are evaluated as a batch
+        :param pose: an optional pose of this program to reuse its arrays
+        :return: Pose
+        """
+        values = self.joint_values(joints)
+        shape = values.shape[:-1] + self.locs.shape
+        if pose is None or pose.program is not self or pose.locs.shape != shape:
+            pose = Pose(self, values, np.empty(shape), np.empty(values.shape[:-1] + self.mates.shape))
+        else:
+            pose.joints = values
+
+        pose.locs[...] = self.locs
+        pose.mates[...] = self.mates
+        handlers = self._handlers
+        for op in self.ops:
+            handlers[op[0]](pose.locs, pose.mates, values, *op[1:])
+        return pose
+
+    def run(self, joints: Union[None, Dict[str, float], np.ndarray, Sequence[float]] = None) -> np.ndarray:
+        """
+        Replay the program for the given joint parameters
+        :param joints: joint parameters, see joint_values. Leading dimensions are evaluated as a batch
+        :return: array (..., N, 4, 4) of the local node locations
+        """
+        return self.solve(joints).locs
+
+    def world(self, locs: np.ndarray) -> np.ndarray:
+        """
+        Accumulate local node locations to world locations
+        :param locs: array (..., N, 4, 4) of local node locations as returned by run
+        :return: array (..., N, 4, 4) of world node locations
+        """
+        world = np.array(locs)
+        for i, parent in enumerate(self.parents):
+            if parent >= 0:
+                world[..., i, :, :] = world[..., parent, :, :] @ locs[..., i, :, :]
+        return world
+
+    def with_branches(self, branches: Sequence[int]) -> "Program":
+        """
+        Copy of the program that solves all two joint steps on the given intersection branches
+        :param branches: branch (1 or -1) of each two joint step in program order, e.g. Mode.branches
+        :return: Program
+        """
+        crosses = [i for i, op in enumerate(self.ops) if op[0] == CROSS]
+        if len(branches) != len(crosses):
+            raise ValueError(f"Expected {len(crosses)} branches, got {len(branches)}")
+
+        data = self.to_dict()
+        for i, branch in zip(crosses, branches):
+            data["ops"][i][-1] = 1 if branch >= 0 else -1
+        return Program.from_dict(data)
+
+    def modes(
+        self,
+        joints: Union[None, Dict[str, float], np.ndarray, Sequence[float]] = None,
+        tol: float = 1e-6,
+        executor: Optional[Executor] = None,
+        chunksize: int = 256,
+    ) -> Union[List["Mode"], List[List["Mode"]]]:
+        """
+        Enumerate all assembly modes, i.e. all feasible combinations of the intersection branches of the two
+        joint steps. All combinations (of all rows of a batch) are solved as one batch that is split at every
+        two joint step, branches whose circles do not intersect are pruned right there. Modes with the same node
+        locations are merged.
+        :param joints: joint parameters, see joint_values. For a batch (F, J) every row is enumerated separately
+        :param tol: maximum difference of the node locations of identical modes
+        :param executor: thread or process pool to enumerate chunks of the rows of a batch in parallel
+        :param chunksize: number of rows per parallel task
+        :return: list of Mode (for a batch a list of lists), ordered by the branches (1 before -1)
+        """
+        values = self.joint_values(joints)
+        if values.ndim == 1:
+            return self._modes(values[None], tol)[0]
+
+        rows = values.reshape(-1, values.shape[-1])
+        if executor is None:
+            return self._modes(rows, tol)
+        chunks = [rows[i : i + chunksize] for i in range(0, len(rows), chunksize)]
+        return [modes for result in executor.map(self._modes, chunks, [tol] * len(chunks)) for modes in result]
+
+    def _modes(self, rows: np.ndarray, tol: float) -> List[List["Mode"]]:
+        # every entry of the batch is one branch combination of one row
+        locs = np.repeat(self.locs[None], len(rows), axis=0)
+        mates = np.repeat(self.mates[None], len(rows), axis=0)
+        batch, row = rows, np.arange(len(rows))
+        branches = np.zeros((len(rows), 0), dtype=np.int64)
+        for op in self.ops:
+            if op[0] != CROSS:
+                self._handlers[op[0]](locs, mates, batch, *op[1:])
+                continue
+
+            # try both branches for all combinations so far and keep the feasible ones
+            locs, mates, batch, row = (np.concatenate([a, a]) for a in (locs, mates, batch, row))
+            signs = np.repeat([1, -1], len(branches))
+            self._cross(locs, mates, batch, *op[1:-1], signs)
+            branches = np.concatenate([np.concatenate([branches, branches]), signs[:, None]], axis=1)
+
+            feasible = ~np.isnan(mates).any(axis=(1, 2, 3))
+            locs, mates, batch, row, branches = (a[feasible] for a in (locs, mates, batch, row, branches))
+
+        world = self.world(locs)
+        residuals = self.residuals(locs, mates)
+        result: List[List[Mode]] = [[] for _ in range(len(rows))]
+        kept: List[List[int]] = [[] for _ in range(len(rows))]
+        for i in np.lexsort(np.vstack([-branches.T[::-1], row[None]])).tolist():
+            r = row[i]
+            if any(np.abs(world[i] - world[j]).max() <= tol for j in kept[r]):
+                continue
+            kept[r].append(i)
+            pose = Pose(self, batch[i], locs[i], mates[i])
+            result[r].append(
+                Mode(
+                    tuple(branches[i].tolist()),
+                    pose,
+                    Residuals(residuals.pairs, residuals.distances[i], residuals.angles[i]),
+                )
+            )
+        return result
+
+    def trajectories(
+        self,
+        joints: Union[None, Dict[str, float], np.ndarray, Sequence[float]] = None,
+        every: int = 1,
+        names: Optional[Sequence[str]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        World positions of the tracked points over a sweep, computed from the transformations only
+        :param joints: joint parameters, see joint_values. Leading dimensions are evaluated as a batch
+        :param every: decimation, only solve every n-th frame of the first batch dimension
+        :param names: names of the trackers (default: all)
+        :return: dict of tracker name to array (..., 3), e.g. (F, 3) for a sweep of F frames
+        """
+        if every < 1:
+            raise ValueError("every needs to be at least 1")
+        names = self.trackers if names is None else list(names)
+        unknown = set(names) - set(self.trackers)
+        if unknown:
+            raise ValueError(f"Unknown trackers {sorted(unknown)}")
+
+        values = self.joint_values(joints)
+        if values.ndim > 1:
+            values = values[::every]
+        locs = self.solve(values).locs
+
+        world: Dict[int, np.ndarray] = {}  # only the chains of the tracked nodes are accumulated
+        result = {}
+        for name in names:
+            i = self.trackers.index(name)
+            node = int(self.tracker_nodes[i])
+            if node not in world:
+                world[node] = self._world_node(locs, node)
+            m = world[node]
+            result[name] = m[..., :3, :3] @ self.tracker_points[i] + m[..., :3, 3]
+        return result
+
+    def jacobian(
+        self,
+        joints: Union[None, Dict[str, float], np.ndarray, Sequence[float]] = None,
+        mates: bool = False,
+    ) -> np.ndarray:
+        """
+        Jacobian of the world frames of all nodes (or mates) with respect to the joint parameters. The derivatives
+        of all node locations and mate frames are propagated analytically through the op sequence together with
+        the solve (forward mode), including the circle intersections of two joint steps, for all joints and all
+        frames of a sweep in one pass
+        :param joints: joint parameters, see joint_values. Leading dimensions are evaluated as a batch
+        :param mates: differentiate the world mate frames instead of the node locations
+        :return: array (..., N or M, 6, J): linear velocity of the frame origin (rows 0-2) and angular velocity
+                 (rows 3-5, radians) per unit joint value (degree for rotations)
+        """
+        if not self.joints:
+            raise ValueError("Program has no joints")
+
+        values = self.joint_values(joints)
+        n = len(self.joints)
+        dvalues = np.broadcast_to(np.eye(n).reshape((n,) + (1,) * (values.ndim - 1) + (n,)), (n,) + values.shape)
+        if len(self._coupled) > 0:
+            dvalues = np.array(dvalues)
+            dvalues[..., self._coupled] = dvalues[..., self._coupled_sources] * self._coupled_ratios
+
+        locs = np.empty(values.shape[:-1] + self.locs.shape)
+        locs[...] = self.locs
+        frames = np.empty(values.shape[:-1] + self.mates.shape)
+        frames[...] = self.mates
+        dlocs, dframes = np.zeros((n,) + locs.shape), np.zeros((n,) + frames.shape)
+
+        handlers = (self._d_place, self._d_set, self._d_turn, self._d_cross, self._d_align)
+        for op in self.ops:
+            handlers[op[0]](locs, frames, dlocs, dframes, values, dvalues, *op[1:])
+
+        world, dworld = self._d_world(locs, dlocs)
+        if mates:
+            world, dworld = _d_mul(
+                world[..., self.mate_nodes, :, :], dworld[..., self.mate_nodes, :, :], frames, dframes
+            )
+
+        # the angular velocity is the axial vector of dR/dq R^T
+        w = dworld[..., :3, :3] @ np.swapaxes(world[..., :3, :3], -1, -2)
+        twist = np.concatenate(
+            [dworld[..., :3, 3], np.stack([w[..., 2, 1], w[..., 0, 2], w[..., 1, 0]], axis=-1)], axis=-1
+        )
+        return np.moveaxis(twist, 0, -1)
+
+    def velocities(
+        self,
+        joints: Union[None, Dict[str, float], np.ndarray, Sequence[float]],
+        rates: Union[Dict[str, float], np.ndarray, Sequence[float]],
+        mates: bool = False,
+    ) -> np.ndarray:
+        """
+        Linear and angular velocities of all nodes (or mates) for given joint rates
+        :param joints: joint parameters, see joint_values. Leading dimensions are evaluated as a batch
+        :param rates: joint rates (e.g. degrees per second), a dict of joint name to rate or an array (..., J)
+        :param mates: velocities of the world mate frames instead of the node locations
+        :return: array (..., N or M, 6) of linear velocity and angular velocity (radians per time unit)
+        """
+        jacobian = self.jacobian(joints, mates=mates)
+        return (jacobian @ self.joint_values(rates)[..., None, :, None])[..., 0]
+
+    def _frames(self, pose: "Pose", mates: bool) -> np.ndarray:
+        world = self.world(pose.locs)
+        return world[..., self.mate_nodes, :, :] @ pose.mates if mates else world
+
+    def residuals(self, locs: np.ndarray, mates: np.ndarray) -> "Residuals":
+        """
+        Distance of the origins and angle between the z axes of all assembled mate pairs in one batched computation
+        :param locs: array (..., N, 4, 4) of local node locations
+        :param mates: array (..., M, 4, 4) of mate frames
+        :return: Residuals
+        """
+        world = self.world(locs)[..., self.mate_nodes, :, :] @ mates
+        first, second = world[..., self.pairs[:, 0], :, :], world[..., self.pairs[:, 1], :, :]
+        z1, z2 = first[..., :3, 2], second[..., :3, 2]
+        return Residuals(
+            pairs=[(self.mate_names[i], self.mate_names[j]) for i, j in self.pairs.tolist()],
+            distances=_norm(first[..., :3, 3] - second[..., :3, 3]),
+            angles=np.rad2deg(np.arctan2(_norm(np.cross(z1, z2)), _dot(z1, z2))),
+        )
+
+    def _world_node(self, locs: np.ndarray, node: int) -> np.ndarray:
+        chain = self._chains[node]
+        m = locs[..., chain[0], :, :]
+        for i in chain[1:]:
+            m = m @ locs[..., i, :, :]
+        return m
+
+    def _world_mate(self, locs: np.ndarray, mates: np.ndarray, mate: int) -> np.ndarray:
+        return self._world_node(locs, self.mate_nodes[mate]) @ mates[..., mate, :, :]
+
+    def _place(self, locs, mates, values, o_node, t_node, t_mate, o_mate, p_node, joint, dof):
+        m = locs[..., t_node, :, :]
+        if p_node >= 0:
+            m = m @ _inv(locs[..., p_node, :, :])
+        m = m @ mates[..., t_mate, :, :]
+        if joint >= 0:
+            m = m @ _joint(dof, values[..., joint])
+        locs[..., o_node, :, :] = m @ _inv(mates[..., o_mate, :, :])
+
+    def _set(self, locs, mates, values, o_node, constant):
+        locs[..., o_node, :, :] = self.constants[constant]
+
+    def _turn(self, locs, mates, values, o_mate, t_mate, j_mate):
+        w_mate1 = self._world_mate(locs, mates, o_mate)
+        w_mate2 = self._world_mate(locs, mates, t_mate)
+        w_joint = self._world_mate(locs, mates, j_mate)
+
+        origin1, origin2 = w_mate1[..., :3, 3], w_mate2[..., :3, 3]
+        v1 = _axis_point(origin1, w_joint) - origin1
+        v2 = _axis_point(origin2, w_joint) - origin2
+        angle = _angle_with_ref(v2, v1, w_joint[..., :3, 2])
+        mates[..., j_mate, :, :] = mates[..., j_mate, :, :] @ _joint(2, angle)
+
+    def _cross(self, locs, mates, values, o_mate, t_mate, j_mate1, j_mate2, branch):
+        w_mate1 = self._world_mate(locs, mates, o_mate)
+        w_mate2 = self._world_mate(locs, mates, t_mate)
+        w_joint1 = self._world_mate(locs, mates, j_mate1)
+        w_joint2 = self._world_mate(locs, mates, j_mate2)
+
+        origin1, origin2 = w_mate1[..., :3, 3], w_mate2[..., :3, 3]
+        normal1, normal2 = w_joint1[..., :3, 2], w_joint2[..., :3, 2]
+        center1, center2 = _axis_point(origin1, w_joint1), _axis_point(origin2, w_joint2)
+        radius1, radius2 = _norm(center1 - origin1), _norm(center2 - origin2)
+
+        # intersect both circles in the plane of circle 1
+        d_vec = center2 - center1
+        d_vec = d_vec - _dot(d_vec, normal1)[..., None] * normal1
+        d = _norm(d_vec)
+        u = d_vec / d[..., None]
+        a = (radius1**2 - radius2**2 + d**2) / (2 * d)
+        with np.errstate(invalid="ignore"):
+            h = np.sqrt(radius1**2 - a**2)  # nan if the circles do not intersect
+        point = center1 + a[..., None] * u + (branch * h)[..., None] * np.cross(normal1, u)
+
+        angle1 = _angle_with_ref(point - center1, origin1 - center1, normal1)
+        angle2 = _angle_with_ref(point - center2, origin2 - center2, normal2)
+        mates[..., j_mate1, :, :] = mates[..., j_mate1, :, :] @ _joint(2, angle1)
+        mates[..., j_mate2, :, :] = mates[..., j_mate2, :, :] @ _joint(2, angle2)
+
+    def _align(self, locs, mates, values, o_mate, t_mate):
+        w_mate1 = self._world_mate(locs, mates, o_mate)
+        w_mate2 = self._world_mate(locs, mates, t_mate)
+        angle = _angle_with_ref(w_mate1[..., :3, 0], w_mate2[..., :3, 0], w_mate2[..., :3, 2])
+        mates[..., o_mate, :, :] = mates[..., o_mate, :, :] @ _joint(2, angle)
+
+    # Derivatives of the ops, see jacobian. Each handler updates the values and their tangents
+
+    def _d_world(self, locs, dlocs):
+        world, dworld = np.array(locs), np.array(dlocs)
+        for i, parent in enumerate(self.parents):
+            if parent >= 0:
+                world[..., i, :, :], dworld[..., i, :, :] = _d_mul(
+                    world[..., parent, :, :], dworld[..., parent, :, :], locs[..., i, :, :], dlocs[..., i, :, :]
+                )
+        return world, dworld
+
+    def _d_world_mate(self, locs, mates, dlocs, dmates, mate):
+        chain = self._chains[self.mate_nodes[mate]]
+        m, dm = locs[..., chain[0], :, :], dlocs[..., chain[0], :, :]
+        for i in chain[1:]:
+            m, dm = _d_mul(m, dm, locs[..., i, :, :], dlocs[..., i, :, :])
+        return _d_mul(m, dm, mates[..., mate, :, :], dmates[..., mate, :, :])
+
+    def _d_rotate_mate(self, mates, dmates, mate, angle, dangle):
+        rotation, drotation = _d_joint(2, angle, dangle)
+        mates[..., mate, :, :], dmates[..., mate, :, :] = _d_mul(
+            mates[..., mate, :, :], dmates[..., mate, :, :], rotation, drotation
+        )
+
+    def _d_place(
+        self, locs, mates, dlocs, dmates, values, dvalues, o_node, t_node, t_mate, o_mate, p_node, joint, dof
+    ):
+        m, dm = locs[..., t_node, :, :], dlocs[..., t_node, :, :]
+        if p_node >= 0:
+            m, dm = _d_mul(m, dm, *_d_inv(locs[..., p_node, :, :], dlocs[..., p_node, :, :]))
+        m, dm = _d_mul(m, dm, mates[..., t_mate, :, :], dmates[..., t_mate, :, :])
+        if joint >= 0:
+            m, dm = _d_mul(m, dm, *_d_joint(dof, values[..., joint], dvalues[..., joint]))
+        locs[..., o_node, :, :], dlocs[..., o_node, :, :] = _d_mul(
+            m, dm, *_d_inv(mates[..., o_mate, :, :], dmates[..., o_mate, :, :])
+        )
+
+    def _d_set(self, locs, mates, dlocs, dmates, values, dvalues, o_node, constant):
+        locs[..., o_node, :, :] = self.constants[constant]
+        dlocs[..., o_node, :, :] = 0
+
+    def _d_turn(self, locs, mates, dlocs, dmates, values, dvalues, o_mate, t_mate, j_mate):
+        w_mate1, dw_mate1 = self._d_world_mate(locs, mates, dlocs, dmates, o_mate)
+        w_mate2, dw_mate2 = self._d_world_mate(locs, mates, dlocs, dmates, t_mate)
+        w_joint, dw_joint = self._d_world_mate(locs, mates, dlocs, dmates, j_mate)
+
+        origin1, dorigin1 = w_mate1[..., :3, 3], dw_mate1[..., :3, 3]
+        origin2, dorigin2 = w_mate2[..., :3, 3], dw_mate2[..., :3, 3]
+        point1, dpoint1 = _d_axis_point(origin1, dorigin1, w_joint, dw_joint)
+        point2, dpoint2 = _d_axis_point(origin2, dorigin2, w_joint, dw_joint)
+        angle, dangle = _d_angle_with_ref(
+            point2 - origin2, dpoint2 - dorigin2, point1 - origin1, dpoint1 - dorigin1, w_joint[..., :3, 2]
+        )
+        self._d_rotate_mate(mates, dmates, j_mate, angle, dangle)
+
+    def _d_cross(self, locs, mates, dlocs, dmates, values, dvalues, o_mate, t_mate, j_mate1, j_mate2, branch):
+        w_mate1, dw_mate1 = self._d_world_mate(locs, mates, dlocs, dmates, o_mate)
+        w_mate2, dw_mate2 = self._d_world_mate(locs, mates, dlocs, dmates, t_mate)
+        w_joint1, dw_joint1 = self._d_world_mate(locs, mates, dlocs, dmates, j_mate1)
+        w_joint2, dw_joint2 = self._d_world_mate(locs, mates, dlocs, dmates, j_mate2)
+
+        origin1, dorigin1 = w_mate1[..., :3, 3], dw_mate1[..., :3, 3]
+        origin2, dorigin2 = w_mate2[..., :3, 3], dw_mate2[..., :3, 3]
+        normal1, dnormal1 = w_joint1[..., :3, 2], dw_joint1[..., :3, 2]
+        normal2 = w_joint2[..., :3, 2]
+        center1, dcenter1 = _d_axis_point(origin1, dorigin1, w_joint1, dw_joint1)
+        center2, dcenter2 = _d_axis_point(origin2, dorigin2, w_joint2, dw_joint2)
+        radius1, dradius1 = _d_norm(center1 - origin1, dcenter1 - dorigin1)
+        radius2, dradius2 = _d_norm(center2 - origin2, dcenter2 - dorigin2)
+
+        # see _cross
+        d_vec, dd_vec = center2 - center1, dcenter2 - dcenter1
+        k, dk = _d_dot(d_vec, dd_vec, normal1, dnormal1)
+        d_vec, dd_vec = d_vec - k[..., None] * normal1, dd_vec - dk[..., None] * normal1 - k[..., None] * dnormal1
+        d, dd = _d_norm(d_vec, dd_vec)
+        u = d_vec / d[..., None]
+        du = (dd_vec - u * dd[..., None]) / d[..., None]
+        a = (radius1**2 - radius2**2 + d**2) / (2 * d)
+        da = (radius1 * dradius1 - radius2 * dradius2 + d * dd - a * dd) / d
+        with np.errstate(invalid="ignore", divide="ignore"):
+            h = np.sqrt(radius1**2 - a**2)  # nan if the circles do not intersect
+            dh = (radius1 * dradius1 - a * da) / h
+        side, dside = _d_cross(normal1, dnormal1, u, du)
+        point = center1 + a[..., None] * u + (branch * h)[..., None] * side
+        dpoint = (
+            dcenter1 + da[..., None] * u + a[..., None] * du + branch * (dh[..., None] * side + h[..., None] * dside)
+        )
+
+        angle1, dangle1 = _d_angle_with_ref(
+            point - center1, dpoint - dcenter1, origin1 - center1, dorigin1 - dcenter1, normal1
+        )
+        angle2, dangle2 = _d_angle_with_ref(
+            point - center2, dpoint - dcenter2, origin2 - center2, dorigin2 - dcenter2, normal2
+        )
+        self._d_rotate_mate(mates, dmates, j_mate1, angle1, dangle1)
+        self._d_rotate_mate(mates, dmates, j_mate2, angle2, dangle2)
+
+    def _d_align(self, locs, mates, dlocs, dmates, values, dvalues, o_mate, t_mate):
+        w_mate1, dw_mate1 = self._d_world_mate(locs, mates, dlocs, dmates, o_mate)
+        w_mate2, dw_mate2 = self._d_world_mate(locs, mates, dlocs, dmates, t_mate)
+        angle, dangle = _d_angle_with_ref(
+            w_mate1[..., :3, 0], dw_mate1[..., :3, 0], w_mate2[..., :3, 0], dw_mate2[..., :3, 0], w_mate2[..., :3, 2]
+        )
+        self._d_rotate_mate(mates, dmates, o_mate, angle, dangle)
+
+
+@dataclass
+class Residuals:
+    pairs: List[Tuple[str, str]]  # (object mate, target mate) names
+    distances: np.ndarray  # (..., P) distance of the mate origins
+    angles: np.ndarray  # (..., P) angle between the mate z axes in degrees
+
+    def __repr__(self):
+        distance, angle = self.max()
+        batch = self.distances.shape[:-1]
+        return f"Residuals(pairs: {len(self.pairs)}, batch: {batch}, max: {distance:.3g} / {angle:.3g} deg)"
+
+    def max(self) -> Tuple[float, float]:
+        """Largest distance and angle over all pairs (and poses)"""
+        if self.distances.size == 0:
+            return 0.0, 0.0
+        return float(np.nanmax(self.distances)), float(np.nanmax(self.angles))
+
+    def violations(self, tol: float = 1e-6, angle_tol: float = 1e-6) -> np.ndarray:
+        """
+        Mask of pairs that do not coincide (infeasible poses with NaN residuals count as violations)
+        :param tol: maximum distance of the mate origins
+        :param angle_tol: maximum angle between the mate z axes in degrees
+        :return: bool array (..., P)
+        """
+        return ~((self.distances <= tol) & (self.angles <= angle_tol))
+
+    def report(self, sort: str = "distance", limit: Optional[int] = None) -> List[Tuple[str, str, float, float]]:
+        """
+        Worst residual of each pair (over all poses of a batch), largest first
+        :param sort: "distance" or "angle"
+        :param limit: number of rows to return (None: all)
+        :return: list of (object mate, target mate, distance, angle)
+        """
+        if sort not in ("distance", "angle"):
+            raise ValueError(f"Cannot sort by '{sort}', use 'distance' or 'angle'")
+        if not self.pairs:
+            return []
+
+        # NaN marks an infeasible pose, rank it first
+        distances = np.where(np.isnan(self.distances), np.inf, self.distances).reshape(-1, len(self.pairs))
+        angles = np.where(np.isnan(self.angles), np.inf, self.angles).reshape(-1, len(self.pairs))
+        distances, angles = distances.max(axis=0, initial=0), angles.max(axis=0, initial=0)
+        order = np.argsort(-(distances if sort == "distance" else angles), kind="stable")[:limit]
+        return [(*self.pairs[i], float(distances[i]), float(angles[i])) for i in order.tolist()]
+
+
+@dataclass
+class Mode:
+    branches: Tuple[int, ...]  # intersection branch (1 or -1) of each two joint step in program order
+    pose: "Pose"
+    residuals: Residuals
+
+    def __repr__(self):
+        distance, angle = self.residuals.max()
+        return f"Mode(branches: {self.branches}, residuals: {distance:.3g} / {angle:.3g} deg)"
+
+
+class Pose:
+    def __init__(self, program: Program, joints: np.ndarray, locs: np.ndarray, mates: np.ndarray):
+        """
+        A solved configuration of a program
+        :param program: the program that was solved
+        :param joints: array (..., J) of the joint values
+        :param locs: array (..., N, 4, 4) of the local node locations
+        :param mates: array (..., M, 4, 4) of the mate frames after solving the joints
+        """
+        self.program = program
+        self.joints = joints
+        self.locs = locs
+        self.mates = mates
+
+    def __repr__(self):
+        return f"Pose(joints: {dict(zip(self.program.joints, self.joints.T.tolist()))}, batch: {self.locs.shape[:-3]})"
+
+    def copy(self) -> "Pose":
+        return Pose(self.program, np.array(self.joints), np.array(self.locs), np.array(self.mates))
+
+    def world(self) -> np.ndarray:
+        """
+        World locations of all nodes
+        :return: array (..., N, 4, 4)
+        """
+        return self.program.world(self.locs)
+
+    def residuals(self) -> Residuals:
+        """
+        Residuals of all assembled mate pairs of the program in this pose
+        :return: Residuals
+        """
+        return self.program.residuals(self.locs, self.mates)
+
+
+def load(filename: str) -> Program:
+    """
+    Load a kinematic description saved with Program.save. Only numpy is needed, neither cadquery nor OCP
+    :param filename: name of the JSON file
+    :return: Program
+    """
+    with open(filename) as fd:
+        return Program.from_dict(json.load(fd))
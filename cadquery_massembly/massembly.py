@@ -1,15 +1,93 @@
+import re
 from math import pi
 from collections import OrderedDict
-from dataclasses import dataclass
-from typing import Optional, Union, Tuple, Dict, List, overload
+from dataclasses import dataclass, field
+from concurrent.futures import Executor
+from functools import wraps
+from typing import Optional, Union, Tuple, Dict, List, Iterable, AsyncIterable, overload, TYPE_CHECKING
 
-from cadquery import Workplane, Location, Assembly
+import numpy as np
+
+from cadquery import Workplane, Location, Assembly, Vector, Shape, Compound
+from OCP.gp import gp_Trsf
 from .mate import Mate
-from .geom import Circle
+from .kinematics import _joint, Program, Pose, Residuals, DOFS, PLACE, SET, TURN, CROSS, ALIGN
+from .streaming import PoseStream
+from .instances import InstanceTable
+from .tessellation import Tessellator, Mesh
+from .journal import Journal, Entry
+from .footprint import Footprint, footprint
+from .observers import Notifier, Observer
+from .cache import BuildCache
+
+if TYPE_CHECKING:
+    from .geom import Circle
+    from .discover import MatePair
 
 Selector = Tuple[str, Union[str, Tuple[float, float]]]
 
 
+def _loc_to_matrix(loc: Location) -> np.ndarray:
+    trsf = loc.wrapped.Transformation()
+    m = np.eye(4)
+    for i in range(3):
+        for j in range(4):
+            m[i, j] = trsf.Value(i + 1, j + 1)
+    return m
+
+
+def _matrix_to_loc(m: np.ndarray) -> Location:
+    trsf = gp_Trsf()
+    trsf.SetValues(*np.asarray(m, dtype=float)[:3].ravel().tolist())
+    return Location(trsf)
+
+
+def _to_shape(obj: Union[Shape, Workplane]) -> Shape:
+    if isinstance(obj, Workplane):
+        vals = [val for val in obj.vals() if isinstance(val, Shape)]
+        return vals[0] if len(vals) == 1 else Compound.makeCompound(vals)
+    return obj
+
+
+def _journaled(method):
+    """
+    Record all node and mate changes of a method call as one journal entry (if journaling is enabled)
+    and send them to the observers as one batch
+    """
+
+    notifying = _notifying(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.journal is None:
+            return notifying(self, *args, **kwargs)
+
+        self.journal.begin(method.__name__)
+        try:
+            return notifying(self, *args, **kwargs)
+        finally:
+            self.journal.commit()
+
+    return wrapper
+
+
+def _notifying(method):
+    """Send all node and mate changes of a method call to the observers as one batch (if there are observers)"""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.notifier is None:
+            return method(self, *args, **kwargs)
+
+        self.notifier.begin(method.__name__)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.notifier.commit()
+
+    return wrapper
+
+
 @dataclass
 class MateDef:
     mate: Mate
@@ -18,7 +96,7 @@ class MateDef:
 
     @property
     def world_mate(self):
-        mate = self.mate
+        mate = self._read_mate()
         assembly = self.assembly
 
         while assembly is not None:
@@ -27,6 +105,85 @@ class MateDef:
 
         return mate
 
+    def frame(self) -> np.ndarray:
+        """The mate relative to its assembly as array (4, 4)"""
+        return _loc_to_matrix(self.mate.loc)
+
+    def _read_mate(self) -> Mate:
+        """The mate for read only access"""
+        return self.mate
+
+
+class MatePattern:
+    def __init__(self, frames: np.ndarray):
+        """
+        Mate frames of a pattern, calculated from one base mate
+        :param frames: array (N, 4, 4) of the mate frames relative to their assembly
+        """
+        self.frames = frames
+        self.frames.setflags(write=False)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def mate(self, index: int) -> Mate:
+        frame = self.frames[index]
+        return Mate(Vector(*frame[:3, 3]), Vector(*frame[:3, 0]), Vector(*frame[:3, 2]))
+
+
+class PatternMateDef(MateDef):
+    def __init__(self, pattern: MatePattern, index: int, assembly: "MAssembly", origin: bool):
+        # the Mate object is only created when it is accessed (and possibly modified)
+        self.pattern = pattern
+        self.index = index
+        self.assembly = assembly
+        self.origin = origin
+        self._mate: Optional[Mate] = None
+
+    def __repr__(self):
+        return f"PatternMateDef(index={self.index}, assembly={self.assembly}, origin={self.origin})"
+
+    @property
+    def mate(self) -> Mate:
+        if self._mate is None:
+            self._mate = self.pattern.mate(self.index)
+        return self._mate
+
+    @mate.setter
+    def mate(self, mate: Mate):
+        self._mate = mate
+
+    def frame(self) -> np.ndarray:
+        return self.pattern.frames[self.index] if self._mate is None else super().frame()
+
+
+class LinkedMateDef(MateDef):
+    def __init__(self, source: MateDef, assembly: "MAssembly", origin: bool):
+        # reads go to the mate of the imported assembly, it is only copied when it is accessed (and possibly modified)
+        self.source = source
+        self.assembly = assembly
+        self.origin = origin
+        self._mate: Optional[Mate] = None
+
+    def __repr__(self):
+        return f"LinkedMateDef(source={self.source}, assembly={self.assembly}, origin={self.origin})"
+
+    @property
+    def mate(self) -> Mate:
+        if self._mate is None:
+            self._mate = self.source._read_mate().copy()
+        return self._mate
+
+    @mate.setter
+    def mate(self, mate: Mate):
+        self._mate = mate
+
+    def frame(self) -> np.ndarray:
+        return self.source.frame() if self._mate is None else super().frame()
+
+    def _read_mate(self) -> Mate:
+        return self.source._read_mate() if self._mate is None else self._mate
+
 
 @dataclass
 class DOF:
@@ -35,11 +192,94 @@ class DOF:
     dof: str
 
 
+@dataclass
+class SolverState:
+    tol: float = 1e-6
+    max_iter: int = 10
+    seeds: Dict[Tuple[str, str], Vector] = field(default_factory=dict)
+    iterations: Dict[Tuple[str, str], int] = field(default_factory=dict)
+    total_iterations: int = 0
+    cold_starts: int = 0
+
+    def solve(self, key: Tuple[str, str], circle1: "Circle", circle2: "Circle", solution: int) -> Optional[Vector]:
+        """
+        Intersect two joint circles, seeded by the last solution for the same object and target mates
+        :param key: tuple of object and target mate name
+        :param circle1: circle of the first joint
+        :param circle2: circle of the second joint
+        :param solution: index of the intersection point to use for a cold start
+        :return: the intersection point or None
+        """
+        seed = self.seeds.get(key)
+        point, iterations = None, 0
+        if seed is not None:
+            point, iterations = circle1.intersect_near(circle2, seed, self.tol, self.max_iter)
+
+        if point is None:
+            self.cold_starts += 1
+            points = circle1.intersect(circle2, self.tol)
+            if seed is not None and len(points) > 0:
+                # stay on the branch closest to the last frame
+                point = min(points, key=lambda p: (p - seed).Length)
+            elif len(points) > solution:
+                point = points[solution]
+
+        self.iterations[key] = iterations
+        self.total_iterations += iterations
+        if point is not None:
+            self.seeds[key] = point
+
+        return point
+
+    def reset(self):
+        self.seeds.clear()
+        self.iterations.clear()
+        self.total_iterations = 0
+        self.cold_starts = 0
+
+
+@dataclass
+class Step:
+    object_name: str
+    target: Union[str, Location]
+    joint1: Optional[DOF]
+    joint2: Optional[DOF]
+    branch: int
+
+    @property
+    def key(self) -> Tuple[str, Optional[str]]:
+        """Object mate and target mate name (None for Location targets), assembled at most once"""
+        return self.object_name, self.target if isinstance(self.target, str) else None
+
+
 class MAssembly(Assembly):
     def __init__(self, *args, **kwargs):
         self.mates: Dict[str, MateDef] = {}
+        self.solver: Optional[SolverState] = None
+        self._steps: List[Step] = []
+        self.trackers: Dict[str, Tuple["MAssembly", Tuple[float, float, float]]] = {}
+        self.couplings: Dict[str, Tuple[str, float, float]] = {}
+        self.journal: Optional[Journal] = None
+        self.notifier: Optional[Notifier] = None
+        self._full_obj = None  # full geometry while a proxy is shown
+        self._proxies: Dict[tuple, tuple] = {}
+        self.cache: Optional[BuildCache] = None
         super().__init__(*args, **kwargs)
 
+    @_notifying
+    def add(self, arg, **kwargs) -> "MAssembly":
+        """
+        Add a part or a copy of a sub assembly, see cadquery.Assembly.add
+        :return: self
+        """
+        known = set(self.objects) if self.notifier is not None else None
+        super().add(arg, **kwargs)
+        if known is not None:
+            for path in self.objects:
+                if path not in known:
+                    self.notifier.add_node(path)
+        return self
+
     def __repr__(self):
         return f"MAssembly('{self.name}', objects: {len(self.objects)}, children: {len(self.children)})"
 
@@ -109,11 +349,10 @@ class MAssembly(Assembly):
         """
         ...
 
+    @_notifying
     def mate(self, *args, name: str, origin: bool = False, transforms: Union[Dict, OrderedDict] = None) -> "MAssembly":
         if len(args) == 1:
-            query = args[0]
-            id, obj = self._query(query)
-            mate = Mate(obj)
+            id, mate = self._query_mate(args[0])
         elif len(args) == 2:
             id, mate = args
         else:
@@ -124,9 +363,138 @@ class MAssembly(Assembly):
             for k, v in transforms.items():
                 mate = getattr(mate, k)(v)
         self.mates[name] = MateDef(mate, assembly, origin)
+        if self.notifier is not None:
+            self.notifier.touch_mate(name)
 
         return self
 
+    @_notifying
+    def mate_pattern(
+        self,
+        *args,
+        name: str,
+        pattern: np.ndarray,
+        origin: bool = False,
+        transforms: Union[Dict, OrderedDict] = None,
+    ) -> "MAssembly":
+        """
+        Add mates "{name}_0" ... "{name}_{N-1}" derived from one base mate, e.g.
+
+            bearing.mate_pattern("inner@faces@<Z", name="inner", pattern=polar(6), transforms=odict(tx=r5))
+
+        :param args: either query or id, mate of the base mate (see mate)
+        :param name: name prefix of the new mates
+        :param pattern: array (N, 4, 4) of transformations relative to the base mate, e.g. from
+                        cadquery_massembly.patterns.polar, linear or grid
+        :param origin: Whether these mates are the origin of the assembly
+        :param transforms: an ordered dict of rx, ry, rz, tx, ty, tz transformations applied after the pattern
+        :return: self
+        """
+        if len(args) == 1:
+            id, mate = self._query_mate(args[0])
+        elif len(args) == 2:
+            id, mate = args
+        else:
+            raise RuntimeError("Wrong number of arguments, valid are 'id, mate' or 'query'")
+
+        post = np.eye(4)
+        for k, v in (transforms or {}).items():
+            if k not in DOFS:
+                raise ValueError(f"Transformation {k} not supported")
+            post = post @ _joint(DOFS.index(k), v)
+
+        # all mate frames of the pattern in one step
+        frames = _loc_to_matrix(mate.loc) @ np.asarray(pattern, dtype=float).reshape(-1, 4, 4) @ post
+        mate_pattern = MatePattern(frames)
+
+        assembly = self.objects[id]
+        for i in range(len(mate_pattern)):
+            self.mates[f"{name}_{i}"] = PatternMateDef(mate_pattern, i, assembly, origin)
+            if self.notifier is not None:
+                self.notifier.touch_mate(f"{name}_{i}")
+
+        return self
+
+    def use_cache(self, cache: Optional[BuildCache]) -> "MAssembly":
+        """
+        Reuse the mates queried on parts built by the cache (see BuildCache.part) across runs
+        :param cache: the build cache, None switches caching off
+        :return: self
+        """
+        self.cache = cache
+        return self
+
+    def _query_mate(self, query: str) -> Tuple[str, Mate]:
+        def query_mate():
+            return Mate(self._query(query)[1])
+
+        name = re.split(r"[?@]", query, 1)[0].strip()
+        key = None if self.cache is None or name not in self.objects else self.cache.part_key(self.objects[name].obj)
+        if key is None:
+            return self._query(query)[0], query_mate()
+
+        selector = re.sub(r"\s+", "", query[query.index(name) + len(name) :])
+        return name, self.cache.mate(key, selector, query_mate)
+
+    def track(
+        self,
+        name: str,
+        id: Optional[str] = None,
+        point: Tuple[float, float, float] = (0, 0, 0),
+        mate: Optional[str] = None,
+    ) -> "MAssembly":
+        """
+        Register a point whose world position is returned by Program.trajectories, e.g.
+
+            jansen.track("foot", "leg/foot", (12.5, -3, 0))
+            jansen.track("crank_pin", mate="crank_B")
+
+        :param name: name of the tracker
+        :param id: name of the node the point is fixed to
+        :param point: the point relative to the node
+        :param mate: alternatively track the origin of a mate
+        :return: self
+        """
+        if (id is None) == (mate is None):
+            raise ValueError("Either a node id or a mate name is needed")
+        if mate is not None:
+            # joints only rotate mates around their z axis, so the origin is fixed relative to the node
+            self.trackers[name] = (self.mates[mate].assembly, tuple(self.mates[mate].frame()[:3, 3]))
+        else:
+            self.trackers[name] = (self.objects[id], tuple(point))
+        return self
+
+    def couple(self, joint: str, source: str, ratio: float = 1.0, offset: float = 0.0) -> "MAssembly":
+        """
+        Couple a joint to another joint, e.g. gears or the balls of a bearing rolling with the inner ring
+
+            bearing.couple("cage", "inner", ratio=0.5)
+
+        The coupling is compiled into the program when both joints are compile joints
+        :param joint: name of the coupled joint
+        :param source: name of the joint it follows
+        :param ratio: value of joint = ratio * value of source + offset
+        :param offset: offset in degrees or distance
+        :return: self
+        """
+        if joint == source:
+            raise ValueError(f"Joint {joint} cannot be coupled to itself")
+        self.couplings[joint] = (source, ratio, offset)
+        return self
+
+    def warm_start(self, enable: bool = True, tol: float = 1e-6, max_iter: int = 10) -> "MAssembly":
+        """
+        Solve two joint assemblies statefully, i.e. seed each call with the solution of the last call
+        for the same mates and stay on the closest intersection branch
+        :param enable: switch warm starts on or off (off drops the stored seeds)
+        :param tol: tolerance for the intersection point
+        :param max_iter: maximum number of iterations before falling back to a cold solve
+        :return: self
+        """
+        self.solver = SolverState(tol, max_iter) if enable else None
+        return self
+
+    @_journaled
     def assemble(
         self,
         object_name: str,
@@ -148,28 +516,19 @@ class MAssembly(Assembly):
             z = self.mates[target].world_mate.z_dir
 
             angle = v1.wrapped.AngleWithRef(v2.wrapped, z.wrapped) / pi * 180
-            self.mates[object_name].mate.rz(angle)
+            self._touch_mate(object_name).rz(angle)
 
+        branch = 0
         if joint1 is None and joint2 is None:
-
-            o_mate, o_assy = self.mates[object_name].mate, self.mates[object_name].assembly
-            if isinstance(target, str):
-                t_mate, t_assy = self.mates[target].mate, self.mates[target].assembly
-                if o_assy.parent == t_assy.parent or o_assy.parent is None:
-                    o_assy.loc = t_assy.loc
-                else:
-                    o_assy.loc = t_assy.loc * o_assy.parent.loc.inverse
-                o_assy.loc = o_assy.loc * t_mate.loc * o_mate.loc.inverse
-            else:
-                o_assy.loc = target
+            self._place(object_name, target)
 
         elif joint2 is None:
-            self.assemble(joint1.mate_name, joint1.target_mate_name)
+            self._place(joint1.mate_name, joint1.target_mate_name)
 
             w_mate1 = self.mates[object_name].world_mate
             w_mate2 = self.mates[target].world_mate
 
-            joint_mate = self.mates[joint1.mate_name].mate
+            joint_mate = self._touch_mate(joint1.mate_name)
             w_joint_mate = self.mates[joint1.mate_name].world_mate
 
             if joint1.dof == "rz":
@@ -187,7 +546,7 @@ class MAssembly(Assembly):
                 angle = v2.wrapped.AngleWithRef(v1.wrapped, z.wrapped) / pi * 180
                 joint_mate.rz(angle)
 
-                self.assemble(joint1.mate_name, joint1.target_mate_name)
+                self._place(joint1.mate_name, joint1.target_mate_name)
 
                 # Finally align mates of object and target
                 align_mates()
@@ -200,16 +559,17 @@ class MAssembly(Assembly):
                 raise ValueError(f"DOF {joint1.dof} not supported")
 
         elif isinstance(target, str):
+            from .geom import Circle  # the OCP extrema solvers are only needed for two joint assemblies
 
-            self.assemble(joint1.mate_name, joint1.target_mate_name)
-            self.assemble(joint2.mate_name, joint2.target_mate_name)
+            self._place(joint1.mate_name, joint1.target_mate_name)
+            self._place(joint2.mate_name, joint2.target_mate_name)
 
             w_mate1 = self.mates[object_name].world_mate
-            joint_mate1 = self.mates[joint1.mate_name].mate
+            joint_mate1 = self._touch_mate(joint1.mate_name)
             w_joint_mate1 = self.mates[joint1.mate_name].world_mate
 
             w_mate2 = self.mates[target].world_mate
-            joint_mate2 = self.mates[joint2.mate_name].mate
+            joint_mate2 = self._touch_mate(joint2.mate_name)
             w_joint_mate2 = self.mates[joint2.mate_name].world_mate
 
             # project the mate origin to the rotation axis z_dir
@@ -232,10 +592,16 @@ class MAssembly(Assembly):
                 raise ValueError(f"DOF {joint2.dof} not supported")
 
             if joint1.dof == "rz" and joint2.dof == "rz":
-                points = circle1.intersect(circle2)
+                if self.solver is None:
+                    points = circle1.intersect(circle2)
+                    point = points[solution] if len(points) > solution else None
+                else:
+                    point = self.solver.solve((object_name, target), circle1, circle2, solution)
 
-                if len(points) > solution:
-                    point = points[solution]
+                if point is not None:
+                    # remember on which side of the line between both centers the solution lies
+                    side = (point - center1).dot(circle1.zDir.cross(center2 - center1))
+                    branch = 1 if side >= 0 else -1
 
                     angle1 = circle1.local_angle(point, w_mate1.origin)
                     angle2 = circle2.local_angle(point, w_mate2.origin)
@@ -244,8 +610,8 @@ class MAssembly(Assembly):
                 else:
                     raise RuntimeError("Cannot assemble parts")
 
-            self.assemble(joint1.mate_name, joint1.target_mate_name)
-            self.assemble(joint2.mate_name, joint2.target_mate_name)
+            self._place(joint1.mate_name, joint1.target_mate_name)
+            self._place(joint2.mate_name, joint2.target_mate_name)
 
             # Finally alignm mates of object and target
             align_mates()
@@ -253,17 +619,451 @@ class MAssembly(Assembly):
         else:
             raise ValueError("Wrong parameters")
 
+        # assembling the same mate again, e.g. for every frame of an animation, replaces the earlier record in
+        # place, so that the recorded sequence (and the program compiled from it) does not grow
+        step = Step(object_name, target, joint1, joint2, branch)
+        for i, recorded in enumerate(self._steps):
+            if recorded.key == step.key:
+                self._steps[i] = step
+                break
+        else:
+            self._steps.append(step)
+
         return self
 
+    def _place(self, object_name: str, target: Union[str, Location]):
+        o_mate, o_assy = self.mates[object_name].mate, self.mates[object_name].assembly
+        self._touch_node(o_assy)
+        if isinstance(target, str):
+            t_mate, t_assy = self.mates[target].mate, self.mates[target].assembly
+            if o_assy.parent == t_assy.parent or o_assy.parent is None:
+                o_assy.loc = t_assy.loc
+            else:
+                o_assy.loc = t_assy.loc * o_assy.parent.loc.inverse
+            o_assy.loc = o_assy.loc * t_mate.loc * o_mate.loc.inverse
+        else:
+            o_assy.loc = target
+
+    def _touch_node(self, node: "MAssembly"):
+        """Call before changing loc or obj of a node"""
+        if self.journal is not None:
+            self.journal.touch_node(node)
+        if self.notifier is not None:
+            self.notifier.touch_node(node)
+
+    def _touch_mate(self, name: str) -> Mate:
+        """Call before changing a mate, returns the mate to be modified in place"""
+        if self.journal is not None:
+            self.journal.touch_mate(name)
+        if self.notifier is not None:
+            self.notifier.touch_mate(name)
+        return self.mates[name].mate
+
+    def _touch_entries(self, entries: List[Entry]):
+        """Notify the nodes and mates changed by undoing or replaying journal entries"""
+        if self.notifier is not None:
+            for entry in entries:
+                for node, _, _ in entry.nodes.values():
+                    self.notifier.touch_node(node)
+                for name in entry.mates:
+                    self.notifier.touch_mate(name)
+
+    def subscribe(self, observer: Observer) -> "MAssembly":
+        """
+        Call observer after each operation that changed the assembly, e.g. to update a renderer incrementally
+
+            hexapod.subscribe(lambda changes: viewer.update(changes.nodes))
+
+        All changes of one assemble, apply, relocate, add, mate, mate_pattern, import_mate(s), export_mates,
+        preview, undo, redo or restore call are sent as one Changes object with the paths of the moved (or
+        reshaped) nodes, the names of the changed mates and the paths of the added nodes. Without observers no
+        changes are collected
+        :param observer: function of Changes
+        :return: self
+        """
+        if self.notifier is None:
+            self.notifier = Notifier(self)
+        self.notifier.observers.append(observer)
+        return self
+
+    def unsubscribe(self, observer: Observer) -> "MAssembly":
+        """
+        Remove an observer added with subscribe
+        :param observer: the observer
+        :return: self
+        """
+        if self.notifier is None or observer not in self.notifier.observers:
+            raise ValueError("Observer is not subscribed")
+        self.notifier.observers.remove(observer)
+        if not self.notifier.observers:
+            self.notifier = None
+        return self
+
+    def record(self, enable: bool = True) -> "MAssembly":
+        """
+        Record changes of node locations, mates and assemble steps made by assemble, apply and relocate
+        in a journal to undo, redo and restore them later
+        :param enable: switch journaling on or off (off drops the journal)
+        :return: self
+        """
+        self.journal = Journal(self) if enable else None
+        return self
+
+    @_notifying
+    def undo(self) -> Entry:
+        """
+        Revert the last recorded operation
+        :return: the reverted journal entry
+        """
+        entry = self._journal().undo()
+        self._touch_entries([entry])
+        return entry
+
+    @_notifying
+    def redo(self) -> Entry:
+        """
+        Reapply the last undone operation
+        :return: the reapplied journal entry
+        """
+        entry = self._journal().redo()
+        self._touch_entries([entry])
+        return entry
+
+    def checkpoint(self, name: str) -> "MAssembly":
+        """
+        Name the current state to restore it later
+        :param name: name of the checkpoint
+        :return: self
+        """
+        self._journal().checkpoint(name)
+        return self
+
+    @_notifying
+    def restore(self, name: str) -> "MAssembly":
+        """
+        Go back (or forth) to a named state, only the changes between both states are applied
+        :param name: name of the checkpoint
+        :return: self
+        """
+        self._touch_entries(self._journal().restore(name))
+        return self
+
+    def _journal(self) -> Journal:
+        if self.journal is None:
+            raise RuntimeError("Journal is not enabled, call record() first")
+        return self.journal
+
+    def compile(self, joints: Dict[str, DOF] = None) -> Program:
+        """
+        Compile the sequence of assemble calls so far into a flat kinematic program. Repeated calls for the
+        same object and target mate are compiled once, at the position of their first call
+        :param joints: dict of joint name to DOF. Each DOF adds a parameter (angle in degrees or distance)
+                       to the assemble step placing mate_name onto target_mate_name. Joints coupled with couple
+                       are calculated from their source joint
+        :return: Program, solve it with program.solve(joints) and write the pose back with apply
+        """
+        nodes = self._nodes()
+        paths = {id(node): path for path, node in self.objects.items()}
+        index = {id(node): i for i, node in enumerate(nodes)}
+        parents = [-1 if node.parent is None else index[id(node.parent)] for node in nodes]
+
+        mate_names = list(self.mates)
+        mate_index = {name: i for i, name in enumerate(mate_names)}
+        mate_nodes = [index[id(self.mates[name].assembly)] for name in mate_names]
+        mates = [self.mates[name].frame() for name in mate_names]
+
+        joint_names = list(joints or {})
+        joint_index = {}
+        for i, name in enumerate(joint_names):
+            dof = joints[name]
+            if dof.dof not in DOFS:
+                raise ValueError(f"DOF {dof.dof} not supported")
+            joint_index[(dof.mate_name, dof.target_mate_name)] = (i, DOFS.index(dof.dof))
+
+        constants: List[np.ndarray] = []
+        ops: List[Tuple[int, ...]] = []
+        pairs: Dict[Tuple[int, int], None] = {}  # ordered set of the mate pairs that need to coincide
+        used = set()
+
+        def place(object_name, target):
+            o_assy = self.mates[object_name].assembly
+            t_assy = self.mates[target].assembly
+            p_node = -1 if o_assy.parent == t_assy.parent or o_assy.parent is None else index[id(o_assy.parent)]
+            joint, dof = joint_index.get((object_name, target), (-1, 0))
+            used.add((object_name, target))
+            if joint < 0 or DOFS[dof] == "rz":
+                # a joint rotating about the mate z axis keeps origin and axis, any other moves the mates apart
+                pairs[(mate_index[object_name], mate_index[target])] = None
+            ops.append(
+                (PLACE, index[id(o_assy)], index[id(t_assy)], mate_index[target], mate_index[object_name], p_node)
+                + (joint, dof)
+            )
+
+        for step in self._steps:
+            o_mate = mate_index[step.object_name]
+            if step.joint1 is None and step.joint2 is None:
+                if isinstance(step.target, str):
+                    place(step.object_name, step.target)
+                else:
+                    ops.append((SET, mate_nodes[o_mate], len(constants)))
+                    constants.append(_loc_to_matrix(step.target))
+
+            elif step.joint2 is None:
+                j_mate = mate_index[step.joint1.mate_name]
+                place(step.joint1.mate_name, step.joint1.target_mate_name)
+                ops.append((TURN, o_mate, mate_index[step.target], j_mate))
+                place(step.joint1.mate_name, step.joint1.target_mate_name)
+                ops.append((ALIGN, o_mate, mate_index[step.target]))
+                pairs[(o_mate, mate_index[step.target])] = None
+
+            else:
+                j_mate1, j_mate2 = mate_index[step.joint1.mate_name], mate_index[step.joint2.mate_name]
+                place(step.joint1.mate_name, step.joint1.target_mate_name)
+                place(step.joint2.mate_name, step.joint2.target_mate_name)
+                ops.append((CROSS, o_mate, mate_index[step.target], j_mate1, j_mate2, step.branch))
+                place(step.joint1.mate_name, step.joint1.target_mate_name)
+                place(step.joint2.mate_name, step.joint2.target_mate_name)
+                ops.append((ALIGN, o_mate, mate_index[step.target]))
+                pairs[(o_mate, mate_index[step.target])] = None
+
+        unused = [name for name in joint_names if (joints[name].mate_name, joints[name].target_mate_name) not in used]
+        if unused:
+            raise ValueError(f"Joints {unused} do not match any assemble step")
+
+        # sources before the joints coupled to them
+        couplings: List[Tuple[int, int, float, float]] = []
+        pending = {name: coupling for name, coupling in self.couplings.items() if name in joint_names}
+        while pending:
+            ready = [name for name, (source, _, _) in pending.items() if source not in pending]
+            if not ready:
+                raise ValueError(f"Couplings of joints {sorted(pending)} are cyclic")
+            for name in ready:
+                source, ratio, offset = pending.pop(name)
+                if source not in joint_names:
+                    raise ValueError(f"Joint {name} is coupled to {source} which is not a compile joint")
+                couplings.append((joint_names.index(name), joint_names.index(source), ratio, offset))
+
+        return Program(
+            nodes=[paths[id(node)] for node in nodes],
+            parents=parents,
+            locs=[_loc_to_matrix(node.loc) for node in nodes],
+            mate_names=mate_names,
+            mate_nodes=mate_nodes,
+            mates=mates,
+            constants=constants,
+            ops=ops,
+            joints=joint_names,
+            pairs=list(pairs),
+            trackers=list(self.trackers),
+            tracker_nodes=[index[id(node)] for node, _ in self.trackers.values()],
+            tracker_points=[point for _, point in self.trackers.values()],
+            couplings=couplings,
+        )
+
+    def residuals(self) -> Residuals:
+        """
+        Check all mate pairs placed by assemble in the current state of the assembly, e.g.
+
+            assy.residuals().report(limit=10)
+
+        For sweeps use program.residuals(locs, mates) or pose.residuals() of a compiled program.
+        :return: Residuals with the distance of the origins and the angle between the z axes of each pair
+        """
+        program = self.compile()
+        return program.residuals(program.locs, program.mates)
+
+    @_journaled
+    def apply(self, pose: Pose) -> "MAssembly":
+        """
+        Set the node locations of a pose solved by a program compiled from this assembly
+        :param pose: a single (not batched) pose
+        :return: self
+        """
+        if pose.locs.ndim != 3:
+            raise ValueError("Only a single pose can be applied")
+        for path, loc in zip(pose.program.nodes, pose.locs):
+            self._touch_node(self.objects[path])
+            self.objects[path].loc = _matrix_to_loc(loc)
+        return self
+
+    def stream(
+        self,
+        inputs: Union[Iterable, AsyncIterable],
+        joints: Dict[str, DOF] = None,
+        program: Program = None,
+        maxsize: int = 2,
+        drop: bool = True,
+        executor: Optional[Executor] = None,
+    ) -> PoseStream:
+        """
+        Solve a stream of joint inputs off the event loop, e.g. to drive a live viewer:
+
+            async for pose in assy.stream(inputs, joints):
+                send(pose.world())
+
+        :param inputs: iterable or async iterable of joint parameters
+        :param joints: dict of joint name to DOF to compile the assembly with (ignored if program is given)
+        :param program: an already compiled program of this assembly
+        :param maxsize: maximum number of solved poses waiting for the consumer
+        :param drop: if the consumer is slow, drop the oldest waiting pose (True) or pause solving (False)
+        :param executor: thread or process pool executor (None uses the default executor of the event loop)
+        :return: PoseStream, an async iterator of Pose objects
+        """
+        if program is None:
+            program = self.compile(joints)
+        return PoseStream(program, inputs, maxsize=maxsize, drop=drop, executor=executor)
+
+    def discover_mates(
+        self, kinds: Tuple[str, ...] = ("circle", "cylinder", "plane"), tol: float = 1e-3, angle_tol: float = 1e-3
+    ) -> List["MatePair"]:
+        """
+        Propose mates for features of different parts that coincide in the current world locations
+        (same kind and radius, same origin and parallel axes for circles, same axis and an axial overlap for
+        cylinders, e.g. a pin longer than its hole, same origin and opposite normals for planes)
+        :param kinds: feature kinds to consider, any of "circle" (edges), "cylinder" and "plane" (faces)
+        :param tol: maximum distance of the feature origins (of cylinder axes) and difference of radii
+        :param angle_tol: maximum angle between the feature axes in radians
+        :return: list of MatePair(id1, mate1, id2, mate2, kind, distance), ready for mate(id, mate, name=...)
+        """
+        from .discover import extract_candidates, match_candidates, propose_mates
+
+        nodes = self._nodes()
+        paths = {id(node): path for path, node in self.objects.items()}
+        candidates = extract_candidates(
+            {paths[id(node)]: node for node in nodes}, self._world_matrices(nodes), kinds=kinds
+        )
+        pairs = match_candidates(candidates, tol=tol, angle_tol=angle_tol)
+        return propose_mates(candidates, pairs)
+
+    def flatten(self) -> InstanceTable:
+        """
+        Collect all nodes with shapes into a columnar instance table in one traversal: unique shapes,
+        shape index, world transformation, color and fully qualified path per instance
+        :return: InstanceTable
+        """
+        shapes: List[Shape] = []
+        shape_ids: Dict[int, int] = {}
+        shape_index, transforms, colors, paths = [], [], [], []
+
+        stack = [(self, np.eye(4), None, self.name)]
+        while stack:
+            node, parent_world, parent_color, path = stack.pop()
+            world = parent_world @ _loc_to_matrix(node.loc)
+            color = node.color if node.color is not None else parent_color
+
+            if node.obj is not None:
+                if id(node.obj) not in shape_ids:
+                    shape_ids[id(node.obj)] = len(shapes)
+                    shapes.append(_to_shape(node.obj))
+
+                shape_index.append(shape_ids[id(node.obj)])
+                transforms.append(world)
+                colors.append((np.nan,) * 4 if color is None else color.toTuple())
+                paths.append(path)
+
+            for child in reversed(node.children):
+                stack.append((child, world, color, f"{path}/{child.name}"))
+
+        return InstanceTable(
+            shapes=shapes,
+            shape_index=np.array(shape_index, dtype=np.int64),
+            transforms=np.array(transforms).reshape(-1, 4, 4),
+            colors=np.array(colors, dtype=float).reshape(-1, 4),
+            paths=np.array(paths, dtype=str),
+        )
+
+    def tessellate(self, tessellator: Optional[Tessellator] = None) -> Tuple[InstanceTable, List[Mesh]]:
+        """
+        Tessellate every unique shape of the assembly once
+        :param tessellator: Tessellator with tolerances and caches to use (default: a serial one without disk cache)
+        :return: tuple of the instance table and one mesh per unique shape (instance i uses
+                 meshes[table.shape_index[i]])
+        """
+        table = self.flatten()
+        tessellator = Tessellator(processes=0) if tessellator is None else tessellator
+        return table, tessellator.tessellate(table.shapes)
+
+    def footprint(self) -> Footprint:
+        """
+        Measure the memory footprint per node and per unique shape object: BRep size, face count, number of
+        referencing nodes and mates, aggregated by subtree. Distinct shape objects with identical BRep are
+        reported by duplicates() and could be shared
+        :return: Footprint, e.g. assy.footprint().report(limit=10)
+        """
+        return footprint(self)
+
+    @_notifying
+    def preview(
+        self, mode: Optional[str] = "box", tolerance: float = 1.0, angular_tolerance: float = 0.5
+    ) -> "MAssembly":
+        """
+        Replace the geometry of all parts by lightweight proxies for display and motion, or restore it.
+        Locations and mates are not touched, so assemble, compile and animations work unchanged.
+        Proxies are cached per shape object, so switching back and forth is cheap.
+        :param mode: "box" or "hull" (see proxy.make_proxy), None restores the full geometry
+        :param tolerance: linear deflection of the tessellation for "hull"
+        :param angular_tolerance: angular deflection of the tessellation for "hull"
+        :return: self
+        """
+        from .proxy import make_proxy, MODES
+
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"Unknown proxy mode '{mode}', use one of {MODES}")
+
+        for node in self._nodes():
+            if node._full_obj is None:
+                if mode is None or node.obj is None:
+                    continue
+                node._full_obj = node.obj
+
+            elif mode is None:
+                self._touch_node(node)
+                node.obj, node._full_obj = node._full_obj, None
+                continue
+
+            key = (id(node._full_obj), mode, tolerance, angular_tolerance)
+            if key not in self._proxies:
+                # keep the full object referenced, so that its id cannot be reused
+                proxy = Workplane(make_proxy(_to_shape(node._full_obj), mode, tolerance, angular_tolerance))
+                self._proxies[key] = (node._full_obj, proxy)
+            self._touch_node(node)
+            node.obj = self._proxies[key][1]
+
+        return self
+
+    def _world_matrices(self, nodes: List["MAssembly"]) -> np.ndarray:
+        """World locations of the given nodes (parents before children) as array (N, 4, 4)"""
+        index = {id(node): i for i, node in enumerate(nodes)}
+        world = np.array([_loc_to_matrix(node.loc) for node in nodes]).reshape(-1, 4, 4)
+        for i, node in enumerate(nodes):
+            parent = index.get(id(node.parent))
+            if parent is not None:
+                world[i] = world[parent] @ world[i]
+        return world
+
+    def _nodes(self) -> List["MAssembly"]:
+        """All nodes of the assembly, parents before children"""
+        result = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            result.append(node)
+            stack.extend(reversed(node.children))
+        return result
+
+    @_journaled
     def relocate(self):
         """Relocate the assembly so that all its shapes have their origin at the assembly origin"""
+        if any(node._full_obj is not None for node in self._nodes()):
+            raise RuntimeError("Restore the full geometry with preview(None) before relocating")
 
-        def _relocate(self, origins):
-            origin_mate = origins.get(self.name)
+        def _relocate(assy, origins):
+            origin_mate = origins.get(assy.name)
             if origin_mate is not None:
-                self.obj = None if self.obj is None else Workplane(self.obj.val().moved(origin_mate.loc.inverse))
-                self.loc = Location()
-            for c in self.children:
+                self._touch_node(assy)
+                assy.obj = None if assy.obj is None else Workplane(assy.obj.val().moved(origin_mate.loc.inverse))
+                assy.loc = Location()
+            for c in assy.children:
                 _relocate(c, origins)
 
         origins = {mate_def.assembly.name: mate_def.mate for mate_def in self.mates.values() if mate_def.origin}
@@ -272,11 +1072,13 @@ class MAssembly(Assembly):
         _relocate(self, origins)
 
         # relocate all mates
-        for mate_def in self.mates.values():
+        for name, mate_def in self.mates.items():
             origin_mate = origins.get(mate_def.assembly.name)
             if origin_mate is not None:
+                self._touch_mate(name)
                 mate_def.mate = mate_def.mate.moved(origin_mate.loc.inverse)
 
+    @_notifying
     def export_mates(self, mate_names):
         """
         Take an existing mates and export them to the top level
@@ -285,17 +1087,18 @@ class MAssembly(Assembly):
         :param mate_names: list names of mates to be exported
         :return: self
         """
-        new_mates = []
-        for name, mate_def in self.mates.items():
-            if mate_names.get(name) is not None:
-                new_mates.append((self.name, mate_def.world_mate, mate_names.get(name)))
-
-        self.mates = {}
-        for mate_def in new_mates:
-            self.mate(mate_def[0], mate_def[1], name=mate_def[2])
-
+        removed = list(self.mates)
+        self.mates = {
+            mate_names[name]: MateDef(mate_def.world_mate, self, False)
+            for name, mate_def in self.mates.items()
+            if mate_names.get(name) is not None
+        }
+        if self.notifier is not None:
+            for name in removed + list(self.mates):
+                self.notifier.touch_mate(name)
         return self
 
+    @_notifying
     def import_mate(self, assembly, mate_name, target_assembly_name, target_mate_name, transforms=None, origin=False):
         """
         Import mates from an import Massembly
@@ -318,3 +1121,53 @@ class MAssembly(Assembly):
             origin=origin,
             transforms=transforms,
         )
+        return self
+
+    @_notifying
+    def import_mates(
+        self,
+        assembly: "MAssembly",
+        target_assembly_name: str,
+        prefix: Optional[str] = None,
+        names: Optional[Iterable[str]] = None,
+        origin: bool = False,
+    ) -> "MAssembly":
+        """
+        Import many mates of an added sub assembly by reference, e.g.
+
+            assy.add(leg, name="leg_1").import_mates(leg, "leg_1")  # mates "leg_1_hinge", "leg_1_foot", ...
+
+        Each mate stays relative to its node, so world frames follow the locations of the sub assembly. The mates
+        of the imported assembly are only copied when they are accessed via mate_def.mate, e.g. by assemble.
+        :param assembly: the imported assembly
+        :param target_assembly_name: name of the node in this assembly the imported assembly was added as
+        :param prefix: prefix of the new mate names (default: "{target_assembly_name}_")
+        :param names: names of the mates to import (default: all)
+        :param origin: Whether these mates are the origin of the assembly
+        :return: self
+        """
+        prefix = f"{target_assembly_name}_" if prefix is None else prefix
+        names = list(assembly.mates) if names is None else list(names)
+
+        unknown = [name for name in names if name not in assembly.mates]
+        if unknown:
+            raise ValueError(f"Mates {unknown} do not exist in assembly '{assembly.name}'")
+        existing = [f"{prefix}{name}" for name in names if f"{prefix}{name}" in self.mates]
+        if existing:
+            raise ValueError(f"Mate names {existing} already exist")
+
+        # map the nodes of the imported assembly to the nodes of its copy in this assembly
+        paths = {id(node): path for path, node in assembly.objects.items()}
+        for name in names:
+            mate_def = assembly.mates[name]
+            path = paths[id(mate_def.assembly)]
+            target = target_assembly_name if path == assembly.name else f"{target_assembly_name}/{path}"
+            if target not in self.objects:
+                raise ValueError(
+                    f"Node '{target}' not found, was '{assembly.name}' added as '{target_assembly_name}'?"
+                )
+            self.mates[f"{prefix}{name}"] = LinkedMateDef(mate_def, self.objects[target], origin)
+            if self.notifier is not None:
+                self.notifier.touch_mate(f"{prefix}{name}")
+
+        return self
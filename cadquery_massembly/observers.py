@@ -0,0 +1,89 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .massembly import MAssembly
+
+
+@dataclass
+class Changes:
+    operation: str  # name of the operation, e.g. "assemble", "apply", "undo"
+    nodes: List[str] = field(default_factory=list)  # paths of the nodes whose location or shape changed
+    mates: List[str] = field(default_factory=list)  # names of the changed mates
+    added: List[str] = field(default_factory=list)  # paths of the added nodes
+
+    def __repr__(self):
+        return (
+            f"Changes('{self.operation}', nodes: {len(self.nodes)}, mates: {len(self.mates)}, "
+            f"added: {len(self.added)})"
+        )
+
+    def __bool__(self):
+        return bool(self.nodes or self.mates or self.added)
+
+
+Observer = Callable[[Changes], None]
+
+
+class Notifier:
+    def __init__(self, assembly: "MAssembly"):
+        """
+        Collects the nodes and mates changed by an operation and sends them to all observers as one batch
+        when the (outermost) operation is finished
+        :param assembly: the observed (root) assembly
+        """
+        self.assembly = assembly
+        self.observers: List[Observer] = []
+        self._nodes: Dict[int, "MAssembly"] = {}
+        self._mates: Dict[str, None] = {}  # ordered set
+        self._added: Dict[str, None] = {}
+        self._label = ""
+        self._depth = 0
+
+    def __repr__(self):
+        return f"Notifier(observers: {len(self.observers)})"
+
+    def begin(self, label: str):
+        """Start collecting the changes of an operation (nested operations are part of the outermost one)"""
+        self._depth += 1
+        if self._depth == 1:
+            self._label = label
+
+    def touch_node(self, node: "MAssembly"):
+        """Mark the location or shape of a node as changed"""
+        if self._depth > 0:
+            self._nodes[id(node)] = node
+
+    def touch_mate(self, name: str):
+        """Mark a mate as changed"""
+        if self._depth > 0:
+            self._mates[name] = None
+
+    def add_node(self, path: str):
+        """Mark a node as added"""
+        if self._depth > 0:
+            self._added[path] = None
+
+    def commit(self) -> Optional[Changes]:
+        """
+        Finish an operation and notify all observers
+        :return: the changes, None for nested operations or if nothing changed
+        """
+        self._depth -= 1
+        if self._depth > 0:
+            return None
+
+        paths = {id(node): path for path, node in self.assembly.objects.items()} if self._nodes else {}
+        changes = Changes(
+            self._label,
+            nodes=[paths[key] for key in self._nodes if key in paths and paths[key] not in self._added],
+            mates=list(self._mates),
+            added=list(self._added),
+        )
+        self._nodes, self._mates, self._added = {}, {}, {}
+        if not changes:
+            return None
+
+        for observer in list(self.observers):
+            observer(changes)
+        return changes
@@ -0,0 +1,46 @@
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+from .kinematics import _joint
+
+
+def polar(count: int, step: float = None, start: float = 0.0) -> np.ndarray:
+    """
+    Rotations around the z axis
+    :param count: number of instances
+    :param step: angle between two instances in degrees (default 360 / count)
+    :param start: angle of the first instance in degrees
+    :return: array (count, 4, 4)
+    """
+    step = 360.0 / count if step is None else step
+    return _joint(2, start + step * np.arange(count))
+
+
+def linear(count: int, step: float, direction: Sequence[float] = (1, 0, 0)) -> np.ndarray:
+    """
+    Translations along a direction
+    :param count: number of instances
+    :param step: distance between two instances
+    :param direction: direction of the pattern (will be normalized)
+    :return: array (count, 4, 4)
+    """
+    direction = np.asarray(direction, dtype=float)
+    result = np.broadcast_to(np.eye(4), (count, 4, 4)).copy()
+    result[:, :3, 3] = np.arange(count)[:, None] * step * direction / np.linalg.norm(direction)
+    return result
+
+
+def grid(counts: Tuple[int, int], steps: Union[float, Tuple[float, float]]) -> np.ndarray:
+    """
+    Translations on a rectangular grid in the xy plane, x varies fastest
+    :param counts: number of instances in x and y direction
+    :param steps: distance between two instances in x and y direction
+    :return: array (counts[0] * counts[1], 4, 4)
+    """
+    steps = (steps, steps) if np.isscalar(steps) else steps
+    y, x = np.meshgrid(np.arange(counts[1]), np.arange(counts[0]), indexing="ij")
+    result = np.broadcast_to(np.eye(4), (x.size, 4, 4)).copy()
+    result[:, 0, 3] = x.ravel() * steps[0]
+    result[:, 1, 3] = y.ravel() * steps[1]
+    return result
@@ -0,0 +1,53 @@
+import numpy as np
+
+from cadquery import Shape, Solid, Face, Wire, Shell, Compound, Vector
+
+MODES = ("box", "hull")
+
+
+def _from_triangles(vertices: np.ndarray, triangles: np.ndarray) -> Shape:
+    faces = []
+    for triangle in triangles:
+        points = vertices[triangle]
+        # skip degenerated triangles, OCCT cannot create faces from them
+        if np.linalg.norm(np.cross(points[1] - points[0], points[2] - points[0])) < 1e-12:
+            continue
+        faces.append(Face.makeFromWires(Wire.makePolygon([Vector(*p) for p in points.tolist()], close=True)))
+    return Shell.makeShell(faces).clean() if faces else Compound.makeCompound([])
+
+
+def _box(shape: Shape) -> Shape:
+    bb = shape.BoundingBox()
+    # keep flat parts visible
+    size = [max(length, 1e-3) for length in (bb.xlen, bb.ylen, bb.zlen)]
+    return Solid.makeBox(*size, pnt=Vector(bb.xmin, bb.ymin, bb.zmin))
+
+
+def _points(shape: Shape, tolerance: float, angular_tolerance: float) -> np.ndarray:
+    vertices, _ = shape.tessellate(tolerance, angular_tolerance)
+    return np.array([v.toTuple() for v in vertices], dtype=float).reshape(-1, 3)
+
+
+def make_proxy(shape: Shape, mode: str = "box", tolerance: float = 1.0, angular_tolerance: float = 0.5) -> Shape:
+    """
+    Create a lightweight stand-in of a shape in the same coordinates
+    :param shape: the full shape
+    :param mode: "box" (axis aligned bounding box) or "hull" (convex hull of a coarse tessellation, needs scipy)
+    :param tolerance: linear deflection of the tessellation for "hull"
+    :param angular_tolerance: angular deflection of the tessellation for "hull"
+    :return: the proxy shape
+    """
+    if mode == "box":
+        return _box(shape)
+
+    if mode == "hull":
+        from scipy.spatial import ConvexHull, QhullError
+
+        vertices = _points(shape, tolerance, angular_tolerance)
+        try:
+            hull = ConvexHull(vertices)
+        except QhullError:  # flat or degenerated shapes
+            return _box(shape)
+        return _from_triangles(vertices, hull.simplices)
+
+    raise ValueError(f"Unknown proxy mode '{mode}', use one of {MODES}")
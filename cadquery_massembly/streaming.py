@@ -0,0 +1,198 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import AsyncIterable, Iterable, Optional, Union
+
+import numpy as np
+
+from .kinematics import Program, Pose
+
+_END = object()
+
+# node index and the upper 3x4 part of the world transformation (row major)
+DELTA_DTYPE = np.dtype([("node", "<u4"), ("transform", "<f4", (12,))])
+
+
+def _solve(program: Program, joints):
+    # Runs in a worker thread or process, hence only return the arrays and not the pose with its program
+    pose = program.solve(joints)
+    return pose.joints, pose.locs, pose.mates
+
+
+async def _aiter(inputs: Union[Iterable, AsyncIterable]):
+    if hasattr(inputs, "__aiter__"):
+        async for item in inputs:
+            yield item
+    else:
+        for item in inputs:
+            yield item
+
+
+class DeltaEncoder:
+    def __init__(self, tol: float = 1e-6):
+        """
+        Encode consecutive poses as deltas, i.e. only nodes whose world location changed by more than tol
+        since it was last sent. The first frame contains all nodes.
+        :param tol: maximum absolute change of any transformation entry that is not sent
+        """
+        self.tol = tol
+        self.reference: Optional[np.ndarray] = None
+
+    def encode(self, pose: Union[Pose, np.ndarray]) -> bytes:
+        """
+        Encode the next frame
+        :param pose: a single pose or an array (N, 4, 4) of world locations
+        :return: bytes of DELTA_DTYPE records (node index, packed float32 3x4 transformation)
+        """
+        world = pose.world() if isinstance(pose, Pose) else np.asarray(pose)
+        if world.ndim != 3:
+            raise ValueError("Only a single pose can be encoded")
+
+        transforms = world[:, :3, :].reshape(len(world), 12).astype(np.float32)
+        if self.reference is None or len(self.reference) != len(transforms):
+            nodes = np.arange(len(transforms))
+            self.reference = transforms
+        else:
+            # compare against what the receiver has, so that small changes cannot accumulate unnoticed
+            nodes = np.nonzero(np.abs(transforms - self.reference).max(axis=1) > self.tol)[0]
+            self.reference[nodes] = transforms[nodes]
+
+        delta = np.empty(len(nodes), dtype=DELTA_DTYPE)
+        delta["node"] = nodes
+        delta["transform"] = transforms[nodes]
+        return delta.tobytes()
+
+    def reset(self):
+        """Send all nodes with the next frame, e.g. for a new receiver"""
+        self.reference = None
+
+
+def decode_delta(data: bytes, world: Optional[np.ndarray] = None, nodes: Optional[int] = None) -> np.ndarray:
+    """
+    Apply an encoded delta to the world locations of the last frame
+    :param data: bytes created by DeltaEncoder.encode
+    :param world: array (N, 4, 4) of the world locations of the last frame (updated in place), None at start
+    :param nodes: number of nodes, only needed when world is None and the first frame is not complete
+    :return: the updated array (N, 4, 4)
+    """
+    delta = np.frombuffer(data, dtype=DELTA_DTYPE)
+    if world is None:
+        world = np.zeros((len(delta) if nodes is None else nodes, 4, 4))
+        world[:, 3, 3] = 1
+    world[delta["node"], :3, :] = delta["transform"].reshape(-1, 3, 4)
+    return world
+
+
+class PoseStream:
+    def __init__(
+        self,
+        program: Program,
+        inputs: Union[Iterable, AsyncIterable],
+        maxsize: int = 2,
+        drop: bool = True,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Async iterator over the poses of a stream of joint inputs
+        :param program: the compiled program to solve
+        :param inputs: iterable or async iterable of joint parameters (see Program.joint_values)
+        :param maxsize: maximum number of solved poses waiting for the consumer
+        :param drop: if the consumer is slow, drop the oldest waiting pose (True) or pause solving (False)
+        :param executor: executor to solve in (None uses the default thread pool of the event loop)
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize needs to be at least 1")
+
+        self.program = program
+        self.inputs = inputs
+        self.maxsize = maxsize
+        self.drop = drop
+        self.executor = executor
+        self.solved = 0
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __repr__(self):
+        return (
+            f"PoseStream(solved: {self.solved}, dropped: {self.dropped}, maxsize: {self.maxsize}, drop: {self.drop})"
+        )
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        # an async generator is closed when the consumer breaks out of the loop (at the latest when it is
+        # garbage collected), so the producer does not keep solving in the background
+        try:
+            while True:
+                try:
+                    pose = await self.__anext__()
+                except StopAsyncIteration:
+                    return
+                yield pose
+        finally:
+            await self.aclose()
+
+    async def __anext__(self) -> Pose:
+        if self._task is None:
+            self._queue = asyncio.Queue(self.maxsize)
+            self._task = asyncio.ensure_future(self._produce())
+
+        item = await self._queue.get()
+        if item is _END:
+            self._queue.put_nowait(_END)  # keep the stream exhausted for further calls
+            raise StopAsyncIteration
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def deltas(self, tol: float = 1e-6):
+        """
+        Async iterator of the encoded deltas of the poses of this stream, see DeltaEncoder
+        :param tol: maximum absolute change of any transformation entry that is not sent
+        """
+        encoder = DeltaEncoder(tol)
+        try:
+            async for pose in self:
+                yield encoder.encode(pose)
+        finally:
+            await self.aclose()
+
+    async def aclose(self):
+        """Stop solving, e.g. when the consumer leaves the loop early"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _produce(self):
+        loop = asyncio.get_running_loop()
+        try:
+            async for joints in _aiter(self.inputs):
+                values, locs, mates = await loop.run_in_executor(self.executor, _solve, self.program, joints)
+                pose = Pose(self.program, values, locs, mates)
+                self.solved += 1
+
+                if self.drop:
+                    while self._queue.full():
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    self._queue.put_nowait(pose)
+                else:
+                    await self._queue.put(pose)
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as ex:  # hand the error over to the consumer
+            await self._queue.put(ex)
+
+        await self._queue.put(_END)
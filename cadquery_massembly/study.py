@@ -0,0 +1,157 @@
+import csv
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from itertools import product
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .kinematics import Program
+
+Metric = Callable[[Dict[str, np.ndarray]], float]
+
+
+def parameter_grid(**axes: Sequence[float]) -> List[Dict[str, float]]:
+    """
+    All combinations of the given parameter values, e.g. parameter_grid(crank=[14, 15, 16], coupler=[48, 50])
+    :param axes: parameter name to list of values
+    :return: list of parameter dicts
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in product(*(list(axes[name]) for name in names))]
+
+
+def parameter_samples(count: int, seed: Optional[int] = None, **ranges: Tuple[float, float]) -> List[Dict[str, float]]:
+    """
+    Latin hypercube sample of the given parameter ranges
+    :param count: number of samples
+    :param seed: seed of the random generator
+    :param ranges: parameter name to (low, high)
+    :return: list of parameter dicts
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in ranges.items():
+        # one sample per stratum, strata shuffled independently per parameter
+        u = (rng.permutation(count) + rng.random(count)) / count
+        columns[name] = low + u * (high - low)
+    return [{name: float(columns[name][i]) for name in ranges} for i in range(count)]
+
+
+@dataclass
+class StudyResult:
+    columns: Dict[str, np.ndarray]  # parameters, metrics and "error" (empty if the candidate succeeded)
+
+    def __len__(self):
+        return len(self.columns["error"])
+
+    def __repr__(self):
+        failed = int(np.count_nonzero(self.columns["error"] != ""))
+        return f"StudyResult(candidates: {len(self)}, failed: {failed}, columns: {list(self.columns)})"
+
+    def row(self, index: int) -> Dict:
+        return {name: column[index].item() for name, column in self.columns.items()}
+
+    def sorted(self, by: str, descending: bool = False) -> "StudyResult":
+        """
+        Candidates sorted by a column, NaN (infeasible) last
+        :param by: name of a parameter or metric
+        :param descending: largest first
+        :return: StudyResult
+        """
+        if by not in self.columns:
+            raise ValueError(f"Unknown column '{by}'")
+        values = self.columns[by]
+        if values.dtype.kind not in "fiu":
+            raise ValueError(f"Cannot sort by the non numeric column '{by}'")
+        order = np.argsort(-values if descending else values, kind="stable")
+        return StudyResult({name: column[order] for name, column in self.columns.items()})
+
+    def save(self, filename: str):
+        """
+        Save the table as CSV file
+        :param filename: name of the CSV file
+        """
+        names = list(self.columns)
+        with open(filename, "w", newline="") as fd:
+            # error messages may contain commas and quotes
+            writer = csv.writer(fd)
+            writer.writerow(names)
+            for i in range(len(self)):
+                writer.writerow([self.columns[name][i] for name in names])
+
+
+def _evaluate(
+    build: Callable[..., Program],
+    joints,
+    metrics: Dict[str, Metric],
+    every: int,
+    candidates: List[Dict[str, float]],
+) -> List[Tuple[List[float], str]]:
+    # runs in worker processes: only the parameters go in and numbers come out
+    results = []
+    for params in candidates:
+        try:
+            trajectories = build(**params).trajectories(joints, every=every)
+            results.append(([float(metric(trajectories)) for metric in metrics.values()], ""))
+        except Exception as ex:  # a failing candidate must not stop the study
+            results.append(([np.nan] * len(metrics), f"{type(ex).__name__}: {ex}"))
+    return results
+
+
+class Study:
+    def __init__(
+        self,
+        build: Callable[..., Program],
+        joints: Union[Dict[str, np.ndarray], np.ndarray],
+        metrics: Dict[str, Metric],
+        every: int = 1,
+    ):
+        """
+        Design of experiments over mechanism dimensions: for each candidate the kinematic program is rebuilt,
+        the motion is swept and the metrics are evaluated on the trajectories of the tracked points
+        :param build: function of the parameters returning a compiled Program with trackers. It should only
+                      create kinematic data, e.g. an MAssembly without shapes. Needs to be a module level
+                      function to run in a process pool
+        :param joints: the motion sweep, see Program.joint_values
+        :param metrics: metric name to function of the dict of tracker name to trajectory (F, 3)
+        :param every: decimation of the sweep, see Program.trajectories
+        """
+        self.build = build
+        self.joints = joints
+        self.metrics = metrics
+        self.every = every
+
+    def run(
+        self, candidates: Sequence[Dict[str, float]], executor: Optional[Executor] = None, chunksize: int = 1
+    ) -> StudyResult:
+        """
+        Evaluate all candidates
+        :param candidates: list of parameter dicts, e.g. from parameter_grid or parameter_samples
+        :param executor: process (or thread) pool to fan out the candidates
+        :param chunksize: number of candidates per parallel task
+        :return: StudyResult with one column per parameter and metric
+        """
+        candidates = list(candidates)
+        names = list(dict.fromkeys(name for params in candidates for name in params))
+        if "error" in names or "error" in self.metrics:
+            raise ValueError("'error' is the name of the error column and cannot be a parameter or metric")
+        collisions = sorted(set(self.metrics) & set(names))
+        if collisions:
+            raise ValueError(f"Metric names {collisions} collide with parameter names")
+
+        chunks = [candidates[i : i + chunksize] for i in range(0, len(candidates), chunksize)]
+        if executor is None:
+            results = [_evaluate(self.build, self.joints, self.metrics, self.every, chunk) for chunk in chunks]
+        else:
+            n = len(chunks)
+            results = executor.map(
+                _evaluate, [self.build] * n, [self.joints] * n, [self.metrics] * n, [self.every] * n, chunks
+            )
+        rows = [row for result in results for row in result]
+
+        columns = {name: np.array([params.get(name, np.nan) for params in candidates], dtype=float) for name in names}
+        for j, name in enumerate(self.metrics):
+            columns[name] = np.array([values[j] for values, _ in rows], dtype=float)
+        columns["error"] = np.array([error for _, error in rows], dtype=str)
+        return StudyResult(columns)
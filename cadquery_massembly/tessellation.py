@@ -0,0 +1,168 @@
+import hashlib
+import os
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from cadquery import Shape
+
+
+@dataclass
+class Mesh:
+    vertices: np.ndarray  # (V, 3) float32
+    triangles: np.ndarray  # (T, 3) uint32
+
+    def __post_init__(self):
+        # meshes are handed out by reference to all instances, hence make them read only
+        self.vertices.setflags(write=False)
+        self.triangles.setflags(write=False)
+
+    @property
+    def nbytes(self) -> int:
+        return self.vertices.nbytes + self.triangles.nbytes
+
+
+def _to_brep(shape: Shape) -> bytes:
+    stream = BytesIO()
+    shape.exportBrep(stream)
+    return stream.getvalue()
+
+
+def _tessellate(brep: bytes, tolerance: float, angular_tolerance: float):
+    # runs in worker processes, so only exchange bytes and arrays
+    shape = Shape.importBrep(BytesIO(brep))
+    vertices, triangles = shape.tessellate(tolerance, angular_tolerance)
+    return (
+        np.array([v.toTuple() for v in vertices], dtype=np.float32).reshape(-1, 3),
+        np.array(triangles, dtype=np.uint32).reshape(-1, 3),
+    )
+
+
+class Tessellator:
+    def __init__(
+        self,
+        tolerance: float = 0.1,
+        angular_tolerance: float = 0.2,
+        cache_size: int = 256,
+        cache_dir: Optional[str] = None,
+        processes: Optional[int] = None,
+    ):
+        """
+        Tessellate shapes once per content: shapes are deduplicated by identity and BRep hash, unique shapes
+        are tessellated in a process pool and the meshes are cached in memory (LRU) and optionally on disk
+        :param tolerance: linear deflection of the tessellation
+        :param angular_tolerance: angular deflection of the tessellation
+        :param cache_size: maximum number of meshes in the memory cache
+        :param cache_dir: directory of the disk cache (None disables it)
+        :param processes: number of worker processes (None: number of CPUs, 0 or 1: tessellate serially)
+        """
+        self.tolerance = tolerance
+        self.angular_tolerance = angular_tolerance
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        self.processes = processes if processes is not None else os.cpu_count()
+        self.hits = 0
+        self.misses = 0
+
+        self._cache: "OrderedDict[str, Mesh]" = OrderedDict()
+        self._keys: "weakref.WeakKeyDictionary[Shape, str]" = weakref.WeakKeyDictionary()
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __repr__(self):
+        return f"Tessellator(cached: {len(self._cache)}, hits: {self.hits}, misses: {self.misses})"
+
+    def key(self, shape: Shape) -> str:
+        """
+        Cache key of a shape: hash of its BRep and the tolerances
+        :param shape: the shape
+        :return: hex digest
+        """
+        return self._key(shape)[0]
+
+    def tessellate(self, shapes: Sequence[Shape]) -> List[Mesh]:
+        """
+        Tessellate shapes, each unique shape only once
+        :param shapes: list of shapes, may contain the same shape many times
+        :return: list of meshes (same object for identical shapes)
+        """
+        meshes: Dict[str, Mesh] = {}
+        todo: Dict[str, bytes] = {}
+        keys = []
+        for shape in shapes:
+            key, brep = self._key(shape)
+            keys.append(key)
+            if key in meshes or key in todo:
+                continue
+            mesh = self._get(key)
+            if mesh is None:
+                todo[key] = _to_brep(shape) if brep is None else brep
+            else:
+                meshes[key] = mesh
+
+        if todo:
+            args = [(brep, self.tolerance, self.angular_tolerance) for brep in todo.values()]
+            if self.processes is not None and self.processes > 1 and len(todo) > 1:
+                with ProcessPoolExecutor(min(self.processes, len(todo))) as executor:
+                    results = list(executor.map(_tessellate, *zip(*args)))
+            else:
+                results = [_tessellate(*arg) for arg in args]
+
+            for key, (vertices, triangles) in zip(todo, results):
+                meshes[key] = Mesh(vertices, triangles)
+                self._put(key, meshes[key])
+
+        self.misses += len(todo)
+        self.hits += len(keys) - len(todo)
+        return [meshes[key] for key in keys]
+
+    def clear(self):
+        """Empty the memory cache (the disk cache is kept)"""
+        self._cache.clear()
+
+    def _key(self, shape: Shape):
+        key = self._keys.get(shape)
+        if key is not None:
+            return key, None
+
+        brep = _to_brep(shape)
+        digest = hashlib.sha256(brep)
+        digest.update(f"{self.tolerance}:{self.angular_tolerance}".encode())
+        key = self._keys[shape] = digest.hexdigest()
+        return key, brep
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _get(self, key: str) -> Optional[Mesh]:
+        mesh = self._cache.get(key)
+        if mesh is not None:
+            self._cache.move_to_end(key)
+            return mesh
+
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            with np.load(self._path(key)) as data:
+                mesh = Mesh(data["vertices"], data["triangles"])
+            self._put(key, mesh, store=False)
+            return mesh
+
+        return None
+
+    def _put(self, key: str, mesh: Mesh, store: bool = True):
+        self._cache[key] = mesh
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        if store and self.cache_dir is not None:
+            # write to a temporary file first, so that concurrent readers never see partial files
+            tmp = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as fd:
+                np.savez(fd, vertices=mesh.vertices, triangles=mesh.triangles)
+            os.replace(tmp, self._path(key))
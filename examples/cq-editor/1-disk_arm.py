@@ -1,4 +1,7 @@
 from collections import OrderedDict as odict
+from math import cos, sin
+
+import numpy as np
 import cadquery as cq
 from cadquery_massembly import Mate, MAssembly
 from cadquery_massembly.cq_editor import show_mates
@@ -74,7 +77,8 @@ disk_arm.mate("base@faces@>Z", name="arm_pivot")
 disk_arm.mate("disk@faces@>Z[-2]", name="disk", origin=True)
 disk_arm.mate("arm?mate", name="arm", origin=True)
 
-check_mates = True
+# the command line runner presets check_mates = False with --assemble
+check_mates = globals().get("check_mates", True)
 if check_mates:
     show_object(disk_arm, name="disk_arm")
     show_mates(disk_arm, show_object)
@@ -224,7 +224,8 @@ for name in leg_names:
     hexapod.mate(f"{name}/lower?{lower}", name=f"leg_{name}_lower_hole", origin=True)
 
 
-check_mates = True
+# the command line runner presets check_mates = False with --assemble
+check_mates = globals().get("check_mates", True)
 if check_mates:
     show_object(hexapod, name="hexapod")
     show_mates(hexapod, show_object, length=5)
@@ -115,7 +115,8 @@ for name in link_list:
     leg.mate(f"{name}?mate", name=name, origin=True)
 
 
-check_mates = True
+# the command line runner presets check_mates = False with --assemble
+check_mates = globals().get("check_mates", True)
 if check_mates:
     show_object(leg, name="leg")
     show_mates(leg, show_object, length=3)
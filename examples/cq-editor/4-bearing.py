@@ -1,5 +1,5 @@
 import cadquery as cq
-from cadquery_massembly import MAssembly, Mate
+from cadquery_massembly import MAssembly, Mate, polar
 from cadquery_massembly.cq_editor import show_mates
 
 
@@ -63,11 +63,14 @@ bearing.mate("inner@faces@<Z", name="inner", origin=True)
 
 for i in range(number_balls):
     bearing.mate(balls[i], Mate(), name=balls[i], origin=True)  # the default Mate is sufficient
-    bearing.mate(
-        "inner@faces@<Z", name="inner_%d" % i, transforms=odict(rz=i * 60, tx=r5, tz=-ball_diam / 2)
-    )
 
-check_mates = True
+# creates the mates inner_0 ... inner_5, rotated by i * 60 degrees around the base mate
+bearing.mate_pattern(
+    "inner@faces@<Z", name="inner", pattern=polar(number_balls), transforms=odict(tx=r5, tz=-ball_diam / 2)
+)
+
+# the command line runner presets check_mates = False with --assemble
+check_mates = globals().get("check_mates", True)
 if check_mates:
     # Assemble the parts
     show_object(bearing, name="bearing")
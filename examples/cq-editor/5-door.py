@@ -155,7 +155,8 @@ door.mate("handle?mate1", name="handle_0", transforms=odict(rx=180))
 door.mate("panel?hole1", name="handle_1")
 
 
-check_mates = True
+# the command line runner presets check_mates = False with --assemble
+check_mates = globals().get("check_mates", True)
 if check_mates:
     show_object(door, name="door")
     show_mates(door, show_object)
@@ -81,7 +81,8 @@ for obj, name in (
     assy.mate(f"{obj}?{name}_m1", name=f"{name}_m1", transforms=odict(rx=0 if "b" in name else 180))
 
 
-check_mates = True
+# the command line runner presets check_mates = False with --assemble
+check_mates = globals().get("check_mates", True)
 if check_mates:
     show_object(assy, name="assy")
     show_mates(assy, show_object, length=2)
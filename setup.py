@@ -5,8 +5,9 @@ setup_args = {
     "version": "1.0.0",
     "description": "A manual assembly system for cadquery based on mates",
     "include_package_data": True,
-    "install_requires": [],
+    "install_requires": ["numpy"],
     "packages": find_packages(),
+    "entry_points": {"console_scripts": ["cadquery-massembly=cadquery_massembly.cli:main"]},
     "zip_safe": False,
     "author": "Bernhard Walter",
     "author_email": "b_walter@arcor.de",
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from cadquery_massembly.kinematics import PLACE, Program
+
+
+def build_four_bar(coupler: float = 40, alpha: float = None, solution: int = 0):
+    """
+    Four-bar with the crank (15) at A, the rocker (30) at D and the ground (40) from A to D
+    :param coupler: length of the coupler
+    :param alpha: crank angle, None assembles the crank with a joint that can be compiled (see drive_four_bar)
+    :param solution: index of the intersection solution of the coupler and the rocker
+    :return: MAssembly
+    """
+    from cadquery_massembly import MAssembly, Mate
+
+    assy = MAssembly(name="ground")
+    for name in ("crank", "coupler", "rocker"):
+        assy.add(MAssembly(name=name), name=name)
+    assy.mate("ground", Mate((0, 0, 0)), name="ground_A")
+    assy.mate("ground", Mate((40, 0, 0)), name="ground_D")
+    assy.mate("crank", Mate((0, 0, 0)), name="crank_A")
+    assy.mate("crank", Mate((15, 0, 0)), name="crank_B")
+    assy.mate("coupler", Mate((0, 0, 0)), name="coupler_B")
+    assy.mate("coupler", Mate((coupler, 0, 0)), name="coupler_C")
+    assy.mate("rocker", Mate((0, 0, 0)), name="rocker_D")
+    assy.mate("rocker", Mate((30, 0, 0)), name="rocker_C")
+    return drive_four_bar(assy, alpha, solution)
+
+
+def drive_four_bar(assy, alpha: float = None, solution: int = 0):
+    """
+    Assemble the crank at an angle and then the coupler and the rocker
+    :param assy: MAssembly created by build_four_bar
+    :param alpha: crank angle, None places crank_A on ground_A, compile with DOF("crank_A", "ground_A", "rz")
+    :param solution: index of the intersection solution of the coupler and the rocker
+    :return: the assembly
+    """
+    import cadquery as cq
+    from cadquery_massembly import DOF
+
+    if alpha is None:
+        assy.assemble("crank_A", "ground_A")
+    else:
+        assy.assemble("crank_A", cq.Location(cq.Vector(), cq.Vector(0, 0, 1), alpha))
+    assy.assemble(
+        "coupler_C",
+        "rocker_C",
+        DOF("coupler_B", "crank_B", "rz"),
+        DOF("rocker_D", "ground_D", "rz"),
+        solution=solution,
+    )
+    return assy
+
+
+def build_turning_program() -> Program:
+    # a child node turned about the z axis of the root by one rz joint (dof 2)
+    return Program(
+        nodes=["root", "root/arm"],
+        parents=[-1, 0],
+        locs=[np.eye(4), np.eye(4)],
+        mate_names=["root", "arm"],
+        mate_nodes=[0, 1],
+        mates=[np.eye(4), np.eye(4)],
+        constants=[],
+        ops=[(PLACE, 1, 0, 0, 1, -1, 0, 2)],
+        joints=["angle"],
+    )
+
+
+@pytest.fixture
+def four_bar():
+    pytest.importorskip("cadquery")
+    return build_four_bar
+
+
+@pytest.fixture
+def drive():
+    return drive_four_bar
+
+
+@pytest.fixture
+def turning_program():
+    return build_turning_program
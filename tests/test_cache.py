@@ -0,0 +1,89 @@
+import subprocess
+import sys
+
+import pytest
+
+cq = pytest.importorskip("cadquery")
+
+from cadquery_massembly import BuildCache, Mate  # noqa: E402
+
+BUILDER = """
+import cadquery as cq
+
+def plate(width, height, holes=()):
+    part = cq.Workplane().box(width, height, 2).faces(">Z").tag("top")
+    for x, y in holes:
+        part = part.workplane().center(x, y).hole(1)
+    return part
+
+def sized(size):
+    return [(lambda s: s * 2)(s) for s in (size,)]
+"""
+
+KEY = """
+import sys
+sys.path.insert(0, {path!r})
+from builder import sized
+from cadquery_massembly import BuildCache
+print(BuildCache({directory!r}).key(sized, 10))
+"""
+
+
+@pytest.fixture
+def builder(tmp_path, monkeypatch):
+    (tmp_path / "builder.py").write_text(BUILDER)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import builder
+
+    yield builder
+    del sys.modules["builder"]
+
+
+def test_keys_are_stable_across_processes(tmp_path, builder):
+    script = KEY.format(path=str(tmp_path), directory=str(tmp_path / "cache"))
+    keys = {
+        subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+        for _ in range(2)
+    }
+    assert len(keys) == 1
+    assert keys.pop().strip() == BuildCache(str(tmp_path / "cache")).key(builder.sized, 10)
+
+
+def test_keys_change_with_code_and_arguments(tmp_path, builder):
+    cache = BuildCache(str(tmp_path / "cache"))
+    key = cache.key(builder.sized, 1)
+    assert cache.key(builder.sized, 2) != key
+    assert cache.key(builder.sized, size=1) != key
+    assert BuildCache(str(tmp_path / "cache"), version="2").key(builder.sized, 1) != key
+
+    # a change inside the nested lambda changes the key
+    namespace = {}
+    exec(BUILDER.replace("s * 2", "s * 3"), namespace)
+    namespace["sized"].__module__, namespace["sized"].__qualname__ = builder.sized.__module__, "sized"
+    assert cache.key(namespace["sized"], 1) != key
+
+
+def test_arguments_without_stable_repr_are_rejected(tmp_path, builder):
+    cache = BuildCache(str(tmp_path / "cache"))
+    with pytest.raises(ValueError, match="stable repr"):
+        cache.key(builder.plate, cq.Workplane(), 1)
+
+
+def test_parts_and_mates_are_cached(tmp_path, builder):
+    cache = BuildCache(str(tmp_path / "cache"))
+    part = cache.part(builder.plate, 10, 20)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    loaded = BuildCache(str(tmp_path / "cache")).part(builder.plate, 10, 20)
+    assert loaded.val().isValid()
+    assert abs(loaded.val().Volume() - part.val().Volume()) < 1e-9
+    assert "top" in loaded.ctx.tags
+
+    key = cache.part_key(part)
+    assert key is not None and cache.part_key(cq.Workplane()) is None
+    first = cache.mate(key, "@faces@>Z", lambda: Mate((1, 2, 3)))
+    second = BuildCache(str(tmp_path / "cache")).mate(key, "@faces@>Z", lambda: pytest.fail("not cached"))
+    assert second.origin.toTuple() == first.origin.toTuple() == (1, 2, 3)
+
+    cache.clear()
+    assert cache._entries() == []
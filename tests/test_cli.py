@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("cadquery")
+
+from cadquery_massembly.cli import main  # noqa: E402
+
+SCRIPT = """
+import cadquery as cq
+from cadquery_massembly import MAssembly, Mate
+
+size = float(open("size.txt").read())
+assy = MAssembly(cq.Workplane().box(size, size, 1), name="base")
+assy.add(cq.Workplane().box(1, 1, 1), name="part")
+assy.mate("base", Mate((size, 0, 0)), name="base_end")
+assy.mate("part", Mate(), name="part", origin=True)
+
+check_mates = globals().get("check_mates", True)
+if not check_mates:
+    assy.assemble("part", "base_end")
+show_object(assy, name="assy")
+"""
+
+
+@pytest.fixture
+def script(tmp_path):
+    folder = tmp_path / "scripts"
+    folder.mkdir()
+    (folder / "size.txt").write_text("4")
+    (folder / "box.py").write_text(SCRIPT)
+    return str(folder / "box.py")
+
+
+def test_script_runs_in_its_folder(script, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    assert main([script, "--residuals", "--program", "{stem}.json", "--json"]) == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["shown"] == ["assy"]
+    assert os.getcwd() == str(tmp_path)
+    # outputs are relative to the current folder, not the script's
+    assert (tmp_path / "box.json").exists()
+
+
+def test_assemble_presets_check_mates(script, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    assert main([script, "--program", "without.json", "--json"]) == 0
+    assert main([script, "--assemble", "--program", "with.json", "--json"]) == 0
+    assert json.loads((tmp_path / "without.json").read_text())["ops"] == []
+    assert len(json.loads((tmp_path / "with.json").read_text())["ops"]) == 1
+
+
+def test_failing_script(tmp_path, capsys):
+    bad = tmp_path / "bad.py"
+    bad.write_text("raise RuntimeError('broken')")
+    assert main([str(bad), "--json"]) == 1
+    assert "broken" in json.loads(capsys.readouterr().out)["error"]
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from cadquery_massembly.kinematics import Program, load
+
+cq = pytest.importorskip("cadquery")
+
+from cadquery_massembly import DOF, MAssembly, Mate  # noqa: E402
+
+GEARS = ("a", "b", "c")
+JOINTS = {name: DOF(name, f"ground_{name}", "rz") for name in GEARS}
+
+
+def gear_train():
+    assy = MAssembly(name="ground")
+    for i, name in enumerate(GEARS):
+        assy.add(MAssembly(name=name), name=name)
+        assy.mate("ground", Mate((10 * i, 0, 0)), name=f"ground_{name}")
+        assy.mate(name, Mate(), name=name)
+        assy.assemble(name, f"ground_{name}")
+    return assy
+
+
+def angles(program: Program, locs: np.ndarray) -> np.ndarray:
+    world = program.world(locs)
+    nodes = [program.nodes.index(name) for name in GEARS]
+    return np.rad2deg(np.arctan2(world[..., nodes, 1, 0], world[..., nodes, 0, 0]))
+
+
+def test_coupling_chain():
+    # c follows b, b follows a, declared in reverse order
+    program = gear_train().couple("c", "b", ratio=-2).couple("b", "a", ratio=-0.5, offset=10).compile(JOINTS)
+    values = program.joint_values({"a": [0, 20, 40]})
+    assert np.allclose(values, [[0, 10, -20], [20, 0, 0], [40, -10, 20]])
+    assert np.allclose(angles(program, program.run({"a": [0, 20, 40]})), values)
+
+    # an array overwrites the coupled columns and keeps the caller's array
+    array = np.zeros((2, 3))
+    array[:, 0] = [20, 40]
+    assert np.allclose(program.joint_values(array), values[1:])
+    assert not array[:, 1:].any()
+
+
+def test_coupled_joints_cannot_be_set():
+    program = gear_train().couple("b", "a").compile(JOINTS)
+    with pytest.raises(ValueError, match="coupled"):
+        program.joint_values({"a": 1, "b": 2})
+
+
+def test_invalid_couplings():
+    with pytest.raises(ValueError, match="itself"):
+        gear_train().couple("a", "a")
+    with pytest.raises(ValueError, match="cyclic"):
+        gear_train().couple("a", "b").couple("b", "a").compile(JOINTS)
+    with pytest.raises(ValueError, match="not a compile joint"):
+        gear_train().couple("b", "a").compile({"b": JOINTS["b"]})
+
+
+def test_couplings_survive_save_and_load(tmp_path):
+    program = gear_train().couple("c", "b", ratio=3).couple("b", "a", offset=5).compile(JOINTS)
+    program.save(tmp_path / "train.json")
+    loaded = load(tmp_path / "train.json")
+    assert loaded.couplings == program.couplings
+    sweep = {"a": np.linspace(0, 90, 10)}
+    assert np.array_equal(loaded.run(sweep), program.run(sweep))
+
+
+def test_coupled_sweep_keeps_the_mates_together():
+    program = gear_train().couple("b", "a", ratio=-1).couple("c", "a", ratio=2).compile(JOINTS)
+    residuals = program.solve({"a": np.linspace(0, 360, 37)}).residuals()
+    assert residuals.distances.shape == (37, 3)
+    assert residuals.max()[0] < 1e-12
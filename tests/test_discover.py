@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+cq = pytest.importorskip("cadquery")
+
+from cadquery_massembly import MAssembly  # noqa: E402
+
+
+def pin_in_plate(length, z=0.0, x=0.0, tilt=0.0):
+    # a 2 mm plate with a hole of radius 1 at the origin and a pin of radius 1 starting at height z
+    plate = cq.Workplane().box(10, 10, 2, centered=(True, True, False)).faces(">Z").workplane().hole(2)
+    pin = cq.Workplane().circle(1).extrude(length)
+    assy = MAssembly(plate, name="plate")
+    assy.add(pin, name="pin", loc=cq.Location(cq.Vector(x, 0, z), cq.Vector(1, 0, 0), tilt))
+    return assy
+
+
+@pytest.mark.parametrize("length, z", [(2, 0), (5, -1), (5, -4.5), (1, 0.5), (20, -10)])
+def test_pins_in_holes(length, z):
+    assy = pin_in_plate(length, z)
+    pairs = assy.discover_mates(kinds=("cylinder",))
+    assert [(pair.id1, pair.id2, pair.kind) for pair in pairs] == [("plate", "pin", "cylinder")]
+    assert pairs[0].distance < 1e-9
+
+    # both mates are at the same world point inside the plate, so assembling them keeps the pin in place
+    pair = pairs[0]
+    assy.mate(pair.id1, pair.mate1, name="hole").mate(pair.id2, pair.mate2, name="pin")
+    hole, pin = assy.mates["hole"].world_mate, assy.mates["pin"].world_mate
+    assert (hole.origin - pin.origin).Length < 1e-9
+    assert 0 <= hole.origin.z <= 2
+    before = assy.objects["pin"].loc.toTuple()
+    assy.assemble("pin", "hole")
+    assert np.allclose(assy.objects["pin"].loc.toTuple(), before, atol=1e-9)
+
+
+@pytest.mark.parametrize(
+    "length, z, x, tilt",
+    [
+        (5, 3, 0, 0),  # above the plate
+        (5, -6, 0, 0),  # below the plate
+        (5, -1, 0.5, 0),  # off the axis
+        (5, -1, 0, 5),  # tilted
+    ],
+)
+def test_pins_outside_holes(length, z, x, tilt):
+    assert pin_in_plate(length, z, x, tilt).discover_mates(kinds=("cylinder",)) == []
+
+
+def test_planes_and_circles():
+    box = cq.Workplane().box(2, 2, 2, centered=(True, True, False))
+    assy = MAssembly(box, name="lower")
+    assy.add(box, name="upper", loc=cq.Location(cq.Vector(0, 0, 2)))
+    pairs = assy.discover_mates(kinds=("plane",))
+    assert [(pair.id1, pair.id2, pair.distance) for pair in pairs] == [("lower", "upper", 0.0)]
+
+    washer = cq.Workplane().circle(3).circle(1).extrude(1)
+    assy = MAssembly(washer, name="lower").add(washer, name="upper", loc=cq.Location(cq.Vector(0, 0, 1)))
+    pairs = assy.discover_mates(kinds=("circle",))
+    assert sorted(round(pair.mate1.origin.z, 6) for pair in pairs) == [1.0, 1.0]
@@ -0,0 +1,34 @@
+import pytest
+
+cq = pytest.importorskip("cadquery")
+
+from cadquery_massembly import MAssembly  # noqa: E402
+
+
+def test_footprint_without_shapes():
+    # kinematic only assemblies, e.g. for design studies
+    assy = MAssembly(name="root")
+    assy.add(MAssembly(name="a"), name="a")
+    footprint = assy.footprint()
+    assert footprint.total() == 0
+    assert footprint.duplicates() == []
+    assert footprint.report() == [("root", 0, 0, 2, 0), ("a", 0, 0, 1, 0)]
+
+
+def test_footprint_duplicates_and_subtrees():
+    assy = MAssembly(name="root")
+    assy.add(cq.Workplane().box(1, 1, 1), name="b1")
+    assy.add(cq.Workplane().box(1, 1, 1), name="b2")
+    box = cq.Workplane().box(2, 2, 2)
+    assy.add(box, name="b3")
+    assy.add(box, name="b4")
+
+    footprint = assy.footprint()
+    assert len(footprint.shape_bytes) == 3
+    assert footprint.shape_instances.tolist() == [1, 1, 2]
+    assert footprint.duplicates() == [[0, 1]]
+    assert footprint.wasted() == footprint.shape_bytes[1]
+
+    root = footprint.report(limit=1)[0]
+    assert root == ("root", 0, footprint.total(), 5, 0)
+    assert footprint.shape_paths(2) == ["b3", "b4"]
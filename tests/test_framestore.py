@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from cadquery_massembly.framestore import FrameStore
+
+
+def test_round_trip(turning_program, tmp_path):
+    program = turning_program()
+    poses = program.solve({"angle": np.arange(10.0)})
+    filename = str(tmp_path / "frames")
+
+    with FrameStore.create(filename, program.nodes, capacity=4, dtype="<f8") as store:
+        assert store.append(poses) == 0
+        assert store.append(poses.world()[3]) == 10  # a single frame
+        assert len(store) == 11
+        assert store.capacity >= 11  # grown twice
+
+    store = FrameStore(filename)
+    assert store.nodes == program.nodes
+    assert len(store) == 11
+    assert np.array_equal(store[:10], poses.world())
+    assert np.array_equal(store[10], poses.world()[3])
+    assert np.array_equal(store[np.array([1, 3])], poses.world()[[1, 3]])
+    assert store.transforms.shape == (11, 2, 3, 4)
+
+    with pytest.raises(RuntimeError, match="read only"):
+        store.append(poses)
+    with pytest.raises(ValueError):
+        store.transforms[0, 0, 0, 0] = 1
+    store.close()
+
+
+def test_reader_refreshes(turning_program, tmp_path):
+    program = turning_program()
+    filename = str(tmp_path / "frames")
+    writer = FrameStore.create(filename, program.nodes, capacity=2)
+    writer.append(program.solve({"angle": [0, 1]}))
+    writer.flush()
+
+    reader = FrameStore(filename)
+    assert len(reader) == 2
+    writer.append(program.solve({"angle": np.arange(2, 7.0)}))  # grows the file
+    writer.flush()
+    assert len(reader) == 2
+    assert reader.refresh() == 7
+    assert np.allclose(reader[6], program.solve({"angle": 6}).world(), rtol=0, atol=1e-6)
+    writer.close()
+    reader.close()
+
+
+def test_invalid_stores(tmp_path):
+    filename = str(tmp_path / "frames")
+    with pytest.raises(ValueError, match="mode"):
+        FrameStore(filename, mode="w")
+
+    (tmp_path / "other").write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError, match="not a frame store"):
+        FrameStore(str(tmp_path / "other"))
+
+    with FrameStore.create(filename, ["root"]) as store:
+        with pytest.raises(ValueError, match="shape"):
+            store.append(np.zeros((2, 4, 4)))
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+cq = pytest.importorskip("cadquery")
+
+from cadquery_massembly import MAssembly, Mate  # noqa: E402
+from cadquery_massembly.massembly import LinkedMateDef  # noqa: E402
+
+
+def leg():
+    assy = MAssembly(name="leg")
+    assy.add(MAssembly(name="lower"), name="lower", loc=cq.Location(cq.Vector(0, 0, -5)))
+    assy.mate("leg", Mate((1, 0, 0)), name="hinge")
+    assy.mate("lower", Mate((0, 0, -3)), name="foot")
+    return assy
+
+
+def robot(*locations):
+    source = leg()
+    assy = MAssembly(name="body")
+    for i, (x, y) in enumerate(locations):
+        assy.add(source, name=f"leg_{i}", loc=cq.Location(cq.Vector(x, y, 0)))
+    return assy, source
+
+
+def test_world_frames_follow_the_sub_assembly():
+    assy, source = robot((10, 0), (0, 10))
+    assy.import_mates(source, "leg_0").import_mates(source, "leg_1")
+    assert sorted(assy.mates) == ["leg_0_foot", "leg_0_hinge", "leg_1_foot", "leg_1_hinge"]
+    assert assy.mates["leg_0_foot"].assembly is assy.objects["leg_0/lower"]
+
+    assert assy.mates["leg_0_hinge"].world_mate.origin.toTuple() == pytest.approx((11, 0, 0))
+    assert assy.mates["leg_1_foot"].world_mate.origin.toTuple() == pytest.approx((0, 10, -8))
+
+    assy.objects["leg_1"].loc = cq.Location(cq.Vector(0, 20, 1))
+    assert assy.mates["leg_1_foot"].world_mate.origin.toTuple() == pytest.approx((0, 20, -7))
+
+
+def test_mates_are_copied_on_access():
+    assy, source = robot((10, 0))
+    assy.import_mates(source, "leg_0")
+    hinge = assy.mates["leg_0_hinge"]
+    assert isinstance(hinge, LinkedMateDef)
+
+    # reads and compiling do not copy
+    hinge.world_mate
+    assy.compile()
+    assert hinge._mate is None
+    assert np.array_equal(hinge.frame(), source.mates["hinge"].frame())
+
+    # modifying the copy leaves the imported assembly unchanged
+    hinge.mate.rz(30)
+    assert hinge._mate is not None
+    assert not np.allclose(hinge.frame(), source.mates["hinge"].frame())
+    assert source.mates["hinge"].mate.x_dir.toTuple() == pytest.approx((1, 0, 0))
+    assert assy.mates["leg_0_foot"]._mate is None
+
+
+def test_names_and_prefix():
+    assy, source = robot((10, 0))
+    assy.import_mates(source, "leg_0", prefix="front_", names=["foot"])
+    assert list(assy.mates) == ["front_foot"]
+
+    with pytest.raises(ValueError, match="do not exist"):
+        assy.import_mates(source, "leg_0", names=["knee"])
+    with pytest.raises(ValueError, match="already exist"):
+        assy.import_mates(source, "leg_0", prefix="front_")
+    with pytest.raises(ValueError, match="not found"):
+        assy.import_mates(source, "leg_9")
+    assert list(assy.mates) == ["front_foot"]
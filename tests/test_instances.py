@@ -0,0 +1,51 @@
+import warnings
+
+import numpy as np
+import pytest
+
+cq = pytest.importorskip("cadquery")
+
+from cadquery_massembly import MAssembly  # noqa: E402
+
+
+def nested():
+    # the box is shared by three nodes, a_b and a/b would have the same flat name without the index
+    box = cq.Workplane().box(1, 1, 1)
+    sphere = cq.Workplane().sphere(1)
+    assy = MAssembly(name="root", loc=cq.Location(cq.Vector(0, 0, 10)))
+    a = MAssembly(box, name="a", loc=cq.Location(cq.Vector(1, 0, 0)), color=cq.Color("red"))
+    a.add(box, name="b", loc=cq.Location(cq.Vector(0, 2, 0)))
+    a.add(sphere, name="c", color=cq.Color("blue"))
+    assy.add(a)
+    assy.add(box, name="a_b", loc=cq.Location(cq.Vector(0, 0, 3)))
+    return assy
+
+
+def test_flatten():
+    table = nested().flatten()
+    assert len(table) == 4 and len(table.shapes) == 2
+    assert list(table.paths) == ["root/a", "root/a/b", "root/a/c", "root/a_b"]
+    assert table.shape_index.tolist() == [0, 0, 1, 0]
+    assert np.allclose(table.transforms[:, :3, 3], [[1, 0, 10], [1, 2, 10], [1, 0, 10], [0, 0, 13]])
+
+    red, blue = cq.Color("red").toTuple(), cq.Color("blue").toTuple()
+    assert np.allclose(table.colors[:3], [red, red, blue])  # b inherits the color of a
+    assert np.isnan(table.colors[3]).all()
+
+
+def test_flat_assembly_names_are_unique():
+    flat = nested().flatten().to_assembly()
+    names = [child.name for child in flat.children]
+    assert len(set(names)) == 4
+    assert names == ["0_root_a", "1_root_a_b", "2_root_a_c", "3_root_a_b"]
+
+    # instances share the shape objects
+    assert flat.children[0].obj is flat.children[1].obj is flat.children[3].obj
+
+
+def test_save(tmp_path):
+    filename = str(tmp_path / "nested.step")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        nested().flatten().save(filename)
+    assert len(cq.importers.importStep(filename).solids().vals()) == 4
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from cadquery_massembly.kinematics import Program
+
+pytest.importorskip("cadquery")
+
+from cadquery_massembly import DOF, MAssembly, Mate  # noqa: E402
+
+
+def twists(program: Program, joints, mates: bool, step: float = 1e-5) -> np.ndarray:
+    # reference: central differences of the world frames
+    values = program.joint_values(joints)
+    columns = []
+    for j in range(len(program.joints)):
+        offset = np.zeros(len(program.joints))
+        offset[j] = step
+        center = program._frames(program.solve(values), mates)
+        d = (
+            program._frames(program.solve(values + offset), mates)
+            - program._frames(program.solve(values - offset), mates)
+        ) / (2 * step)
+        w = d[..., :3, :3] @ np.swapaxes(center[..., :3, :3], -1, -2)
+        columns.append(np.concatenate([d[..., :3, 3], np.stack([w[..., 2, 1], w[..., 0, 2], w[..., 1, 0]], -1)], -1))
+    return np.stack(columns, -1)
+
+
+@pytest.fixture
+def program(four_bar):
+    return four_bar().compile({"crank": DOF("crank_A", "ground_A", "rz")})
+
+
+def test_crank_velocity_is_exact(program):
+    crank = np.linspace(0, 350, 36)
+    jacobian = program.jacobian({"crank": crank}, mates=True)
+    assert jacobian.shape == (36, len(program.mate_names), 6, 1)
+
+    # crank_B moves on a circle of radius 15: |v| = 15 * pi / 180 per degree, about the z axis
+    b = program.mate_names.index("crank_B")
+    speed = np.linalg.norm(jacobian[:, b, :3, 0], axis=-1)
+    assert np.allclose(speed, 15 * np.pi / 180, rtol=0, atol=1e-14)
+    assert np.allclose(jacobian[:, b, 5, 0], np.pi / 180, rtol=0, atol=1e-15)
+
+
+@pytest.mark.parametrize("mates", [False, True])
+def test_jacobian_through_circle_intersection(program, mates):
+    crank = {"crank": np.linspace(0, 350, 36)}
+    assert np.allclose(program.jacobian(crank, mates=mates), twists(program, crank, mates), rtol=0, atol=1e-8)
+
+
+def test_coupler_and_rocker_velocities_are_consistent(program):
+    # the coupler end C and the rocker end C are the same point, hence move with the same velocity
+    v = program.velocities({"crank": np.linspace(0, 350, 36)}, {"crank": 1}, mates=True)
+    c1, c2 = program.mate_names.index("coupler_C"), program.mate_names.index("rocker_C")
+    assert np.allclose(v[:, c1, :3], v[:, c2, :3], rtol=0, atol=1e-12)
+
+
+def test_jacobian_with_couplings(four_bar):
+    assy = four_bar()
+    assy.mate("ground", Mate((0, 0, 0)), name="ground_E")
+    assy.add(MAssembly(name="gear"), name="gear")
+    assy.mate("gear", Mate(), name="gear")
+    assy.assemble("gear", "ground_E")
+    assy.couple("gear", "crank", ratio=-2, offset=10)
+    program = assy.compile({"crank": DOF("crank_A", "ground_A", "rz"), "gear": DOF("gear", "ground_E", "rz")})
+
+    jacobian = program.jacobian({"crank": np.linspace(0, 90, 4)})
+    gear = program.nodes.index("gear")
+    assert np.allclose(jacobian[:, gear, 5, 0], -2 * np.pi / 180)
+    assert np.allclose(jacobian[..., 1], 0)  # coupled joints have no own column
@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+
+cq = pytest.importorskip("cadquery")
+
+from cadquery_massembly import MAssembly, Mate  # noqa: E402
+
+
+def state(assy: MAssembly):
+    world = assy._world_matrices(assy._nodes())
+    mates = np.array([assy.mates[name].frame() for name in sorted(assy.mates)])
+    return world, mates, len(assy._steps)
+
+
+def assert_state(assy: MAssembly, expected):
+    world, mates, steps = state(assy)
+    assert np.allclose(world, expected[0], rtol=0, atol=1e-12)
+    assert np.allclose(mates, expected[1], rtol=0, atol=1e-12)
+    assert steps == expected[2]
+
+
+def test_undo_redo(four_bar, drive):
+    assy = four_bar(alpha=0).record()
+    start = state(assy)
+    drive(assy, 30)
+    driven = state(assy)
+    assert not np.allclose(driven[0], start[0])
+
+    assert assy.undo().label == "assemble"
+    assy.undo()
+    assert_state(assy, start)
+    with pytest.raises(RuntimeError, match="undo"):
+        assy.undo()
+
+    assy.redo()
+    assy.redo()
+    assert_state(assy, driven)
+    with pytest.raises(RuntimeError, match="redo"):
+        assy.redo()
+
+    # the restored steps compile to the same program as assembling directly
+    assert np.allclose(assy.compile().locs, four_bar(alpha=30).compile().locs, rtol=0, atol=1e-12)
+
+
+def test_checkpoints_across_branches(four_bar, drive):
+    assy = four_bar(alpha=0).record().checkpoint("start")
+    start = state(assy)
+    drive(assy, 30).checkpoint("30")
+    at_30 = state(assy)
+
+    assy.restore("start")
+    drive(assy, 90).checkpoint("90")  # a new branch from the start
+    at_90 = state(assy)
+
+    assy.restore("30")
+    assert_state(assy, at_30)
+    assy.restore("90")
+    assert_state(assy, at_90)
+    assy.restore("start")
+    assert_state(assy, start)
+
+    # redo follows the latest branch
+    assy.redo()
+    assy.redo()
+    assert_state(assy, at_90)
+
+    with pytest.raises(ValueError, match="checkpoint"):
+        assy.restore("unknown")
+
+
+def test_undo_restores_replaced_records(four_bar, drive):
+    assy = four_bar(alpha=0).record()
+    steps = list(assy._steps)
+    drive(assy, 30, solution=1)
+    assert len(assy._steps) == 2 and assy._steps != steps
+    assy.undo()
+    assy.undo()
+    assert all(a is b for a, b in zip(assy._steps, steps))
+    assy.redo()
+    assert assy._steps[0] is not steps[0] and assy._steps[1] is steps[1]
+
+
+def test_apply_is_recorded(four_bar):
+    assy = four_bar(alpha=0).record()
+    start = state(assy)
+    program = assy.compile()
+    pose = program.solve()
+    pose.locs[...] = four_bar(alpha=45).compile().locs
+    assy.apply(pose)
+    assert not np.allclose(state(assy)[0], start[0])
+    assy.undo()
+    assert_state(assy, start)
+
+
+def test_undo_keeps_the_preview_state(four_bar, drive):
+    # preview is not journaled, undoing an assemble must not bring back the proxy shown at that time
+    assy = four_bar(alpha=0)
+    crank = assy.objects["crank"]
+    sphere = crank.obj = cq.Workplane().sphere(5)
+    assy.record().preview("box")
+    drive(assy, 30)
+    assy.preview(None)
+    assy.undo()
+    assy.undo()
+    assert crank.obj is sphere and crank._full_obj is None
+
+    assy.preview("box")
+    assy.redo()
+    assy.redo()
+    assert crank._full_obj is sphere and len(crank.obj.val().Faces()) == 6
+    assy.preview(None)
+    assert crank.obj is sphere
+
+
+def test_undo_relocate():
+    box = cq.Workplane().box(2, 2, 2)
+    assy = MAssembly(name="root").add(box, name="part", loc=cq.Location(cq.Vector(5, 0, 0)))
+    assy.mate("part", Mate((1, 0, 0)), name="origin", origin=True)
+    assy.record().relocate()
+    relocated = assy.objects["part"].obj
+    assert relocated is not box
+
+    assy.preview("box")
+    with pytest.raises(RuntimeError, match="preview"):
+        assy.undo()
+    assy.preview(None)
+    assy.undo()
+    assert assy.objects["part"].obj is box
+    assy.redo()
+    assert assy.objects["part"].obj is relocated
+
+
+def test_journal_needs_recording(four_bar, drive):
+    assy = four_bar(alpha=0)
+    with pytest.raises(RuntimeError, match="record"):
+        assy.undo()
+    assy.record()
+    drive(assy, 30)
+    assy.record(False)
+    assert assy.journal is None
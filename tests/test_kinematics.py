@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from cadquery_massembly.kinematics import CROSS, load
+
+pytest.importorskip("cadquery")
+
+from cadquery_massembly import DOF, MAssembly  # noqa: E402
+
+CRANK = {"crank": DOF("crank_A", "ground_A", "rz")}
+
+
+def assembled(assy: MAssembly, nodes) -> np.ndarray:
+    return assy._world_matrices([assy.objects[path] for path in nodes])
+
+
+@pytest.mark.parametrize("solution", [0, 1])
+def test_replay_matches_assemble(four_bar, solution):
+    program = four_bar(solution=solution).compile(CRANK)
+    alphas = list(range(0, 360, 30))
+    world = program.world(program.run({"crank": alphas}))
+    for alpha, frame in zip(alphas, world):
+        expected = assembled(four_bar(alpha=alpha, solution=solution), program.nodes)
+        assert np.allclose(frame, expected, rtol=0, atol=1e-10)
+
+
+def test_replay_without_joints_keeps_the_assembly(four_bar):
+    assy = four_bar(alpha=30)
+    program = assy.compile()
+    assert np.allclose(program.world(program.run()), assembled(assy, program.nodes), rtol=0, atol=1e-10)
+    assert program.solve().residuals().max()[0] < 1e-10
+
+
+def test_saved_program_replays_identically(four_bar, tmp_path):
+    program = four_bar().compile(CRANK)
+    program.save(tmp_path / "four_bar.json")
+    alphas = {"crank": np.linspace(0, 350, 36)}
+    assert np.array_equal(load(tmp_path / "four_bar.json").run(alphas), program.run(alphas))
+
+
+def test_reassembling_does_not_grow_the_program(four_bar, drive):
+    assy = four_bar(alpha=0)
+    program = assy.compile()
+    for alpha in range(0, 730, 5):
+        drive(assy, alpha)
+    assert len(assy._steps) == 2
+    assert assy.compile().ops == program.ops
+
+    # the record is replaced, i.e. the program replays the latest call
+    drive(assy, 30, solution=1)
+    assert [step.branch for step in assy._steps] == [0, four_bar(alpha=30, solution=1)._steps[1].branch]
+    assert np.allclose(assy.compile().run(), four_bar(alpha=30, solution=1).compile().run(), rtol=0, atol=1e-10)
+
+    joint = four_bar()
+    ops = joint.compile(CRANK).ops
+    drive(joint)
+    assert joint.compile(CRANK).ops == ops
+
+
+def test_cross_keeps_the_assembled_branch(four_bar):
+    program0 = four_bar(solution=0).compile(CRANK)
+    program1 = four_bar(solution=1).compile(CRANK)
+    branches = [op[-1] for program in (program0, program1) for op in program.ops if op[0] == CROSS]
+    assert sorted(branches) == [-1, 1]
+
+    # the branch is kept over the full crank rotation, i.e. the coupler never flips to the other solution
+    alphas = {"crank": np.linspace(0, 350, 36)}
+    flipped = program0.with_branches([branches[1]])
+    assert np.allclose(flipped.run(alphas), program1.run(alphas), rtol=0, atol=1e-10)
+    assert not np.allclose(program0.run(alphas), program1.run(alphas), rtol=0, atol=1e-3)
+
+    with pytest.raises(ValueError):
+        program0.with_branches([1, -1])
+
+
+def test_cross_without_intersection_is_nan(four_bar):
+    # B to D ranges from 25 to 55, the circles of radius 10 and 30 only intersect up to 40
+    program = four_bar(coupler=10).compile(CRANK)
+    locs = program.run({"crank": [0, 180]})
+    assert np.isfinite(locs[0]).all()
+    assert np.isnan(locs[1]).any()
+
+
+def test_modes(four_bar):
+    program = four_bar().compile(CRANK)
+    modes = program.modes({"crank": 30})
+    assert [mode.branches for mode in modes] == [(1,), (-1,)]
+    for mode in modes:
+        assert mode.residuals.max()[0] < 1e-10
+        expected = program.with_branches(mode.branches).run({"crank": 30})
+        assert np.allclose(mode.pose.locs, expected, rtol=0, atol=1e-12)
+    assert not np.allclose(modes[0].pose.world(), modes[1].pose.world(), rtol=0, atol=1e-3)
+
+
+def test_modes_batched_and_pruned(four_bar):
+    program = four_bar(coupler=10).compile(CRANK)
+    modes = program.modes({"crank": [0, 180]})
+    assert [len(row) for row in modes] == [2, 0]
@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip("cadquery")
+
+from cadquery_massembly import MAssembly  # noqa: E402
+
+
+def test_one_batch_per_operation(four_bar, drive):
+    assy = four_bar(alpha=0)
+    received = []
+    assy.subscribe(received.append)
+
+    drive(assy, 30)
+    assert [changes.operation for changes in received] == ["assemble", "assemble"]
+    assert received[0].nodes == ["crank"]
+    assert sorted(received[1].nodes) == ["coupler", "rocker"]
+    assert sorted(received[1].mates) == ["coupler_B", "coupler_C", "rocker_D"]
+
+    received.clear()
+    program = assy.compile()
+    assy.apply(program.solve())
+    assert [changes.operation for changes in received] == ["apply"]
+    assert sorted(received[0].nodes) == ["coupler", "crank", "ground", "rocker"]
+
+
+def test_added_nodes(four_bar):
+    assy = four_bar()
+    received = []
+    assy.subscribe(received.append)
+    assy.add(MAssembly(name="slider").add(MAssembly(name="pin"), name="pin"), name="slider")
+    assert len(received) == 1
+    assert sorted(received[0].added) == ["slider", "slider/pin"]
+    assert received[0].nodes == []
+
+
+def test_journal_changes_are_notified(four_bar, drive):
+    assy = four_bar(alpha=0).record()
+    drive(assy, 30)
+    received = []
+    assy.subscribe(received.append)
+
+    assy.undo()
+    assert [(changes.operation, changes.nodes) for changes in received] == [("undo", ["coupler", "rocker"])]
+
+
+def test_unsubscribe(four_bar, drive):
+    assy = four_bar()
+    received = []
+    assy.subscribe(received.append).unsubscribe(received.append)
+    assert assy.notifier is None
+    drive(assy, 30)
+    assert received == []
+    with pytest.raises(ValueError, match="not subscribed"):
+        assy.unsubscribe(received.append)
+
+
+def test_imported_and_exported_mates(four_bar):
+    source = four_bar()
+    assy = MAssembly(name="machine").add(source, name="linkage")
+    received = []
+    assy.subscribe(received.append)
+
+    assy.import_mates(source, "linkage", names=["crank_A", "crank_B"])
+    assy.import_mate(source, "ground_D", "linkage", "linkage_D")
+    assert [(changes.operation, sorted(changes.mates)) for changes in received] == [
+        ("import_mates", ["linkage_crank_A", "linkage_crank_B"]),
+        ("import_mate", ["linkage_D"]),
+    ]
+
+    received.clear()
+    assy.export_mates({"linkage_crank_A": "A"})
+    assert [(changes.operation, sorted(changes.mates)) for changes in received] == [
+        ("export_mates", ["A", "linkage_D", "linkage_crank_A", "linkage_crank_B"])
+    ]
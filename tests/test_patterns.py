@@ -0,0 +1,78 @@
+from collections import OrderedDict as odict
+
+import numpy as np
+import pytest
+
+from cadquery_massembly.patterns import grid, linear, polar
+
+cq = pytest.importorskip("cadquery")
+
+from cadquery_massembly import MAssembly  # noqa: E402
+from cadquery_massembly.massembly import PatternMateDef  # noqa: E402
+
+R5, BALL_DIAM = 7, 5
+
+
+def ring():
+    # the inner ring of the bearing example without the ball groove
+    inner = cq.Workplane(origin=(0, 0, -BALL_DIAM / 2)).circle(6).circle(4).extrude(BALL_DIAM)
+    return MAssembly(name="bearing").add(inner, name="inner", loc=cq.Location(cq.Vector(20, 0, 0)))
+
+
+def test_polar_pattern_matches_the_per_mate_loop():
+    looped, patterned = ring(), ring()
+    for i in range(6):
+        looped.mate("inner@faces@<Z", name=f"inner_{i}", transforms=odict(rz=i * 60, tx=R5, tz=-BALL_DIAM / 2))
+    patterned.mate_pattern(
+        "inner@faces@<Z", name="inner", pattern=polar(6), transforms=odict(tx=R5, tz=-BALL_DIAM / 2)
+    )
+
+    assert sorted(patterned.mates) == sorted(looped.mates)
+    for i in range(6):
+        name = f"inner_{i}"
+        assert np.allclose(patterned.mates[name].frame(), looped.mates[name].frame(), rtol=0, atol=1e-12)
+        expected, actual = looped.mates[name].world_mate, patterned.mates[name].world_mate
+        for attribute in ("origin", "x_dir", "z_dir"):
+            assert (getattr(actual, attribute) - getattr(expected, attribute)).Length < 1e-12
+
+    # compiled programs read the frames without creating Mate objects
+    assert np.allclose(patterned.compile().mates, looped.compile().mates, rtol=0, atol=1e-12)
+
+
+def test_pattern_mates_are_created_on_access():
+    assy = ring().mate_pattern("inner@faces@<Z", name="inner", pattern=polar(6), transforms=odict(tx=R5))
+    mate_defs = [assy.mates[f"inner_{i}"] for i in range(6)]
+    assert all(isinstance(mate_def, PatternMateDef) and mate_def._mate is None for mate_def in mate_defs)
+    assy.compile()
+    assert all(mate_def._mate is None for mate_def in mate_defs)
+
+    # modifying one mate leaves the shared frames and the other mates unchanged
+    frames = np.array(mate_defs[0].pattern.frames)
+    mate_defs[1].mate.rz(10)
+    assert not np.allclose(mate_defs[1].frame(), frames[1])
+    assert np.array_equal(mate_defs[1].pattern.frames, frames)
+    assert all(mate_defs[i]._mate is None for i in (0, 2, 3, 4, 5))
+    with pytest.raises(ValueError):
+        mate_defs[0].pattern.frames[0, 0, 0] = 2
+
+
+def test_pattern_errors():
+    with pytest.raises(ValueError, match="not supported"):
+        ring().mate_pattern("inner@faces@<Z", name="inner", pattern=polar(2), transforms=odict(sx=1))
+    with pytest.raises(RuntimeError, match="arguments"):
+        ring().mate_pattern(name="inner", pattern=polar(2))
+
+
+def test_pattern_generators():
+    assert np.allclose(polar(4)[1, :3, :3], [[0, -1, 0], [1, 0, 0], [0, 0, 1]])
+    rotations = polar(3, step=10, start=5)
+    assert np.allclose(np.degrees(np.arctan2(rotations[:, 1, 0], rotations[:, 0, 0])), [5, 15, 25])
+
+    translations = linear(3, 2, direction=(0, 3, 4))[:, :3, 3]
+    assert np.allclose(translations, [[0, 0, 0], [0, 1.2, 1.6], [0, 2.4, 3.2]])
+
+    positions = grid((3, 2), (1, 5))[:, :3, 3]
+    assert np.allclose(positions, [[0, 0, 0], [1, 0, 0], [2, 0, 0], [0, 5, 0], [1, 5, 0], [2, 5, 0]])
+    for pattern in (polar(5), linear(5, 1), grid((5, 1), 1)):
+        assert pattern.shape == (5, 4, 4)
+        assert np.allclose(pattern[:, 3], [0, 0, 0, 1])
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from cadquery_massembly.kinematics import Program, SET
+
+
+def location_program():
+    # every step sets a fixed location, so there are no mate pairs to check
+    target = np.eye(4)
+    target[:3, 3] = (1, 2, 3)
+    return Program(
+        nodes=["root", "root/part"],
+        parents=[-1, 0],
+        locs=[np.eye(4), np.eye(4)],
+        mate_names=["part"],
+        mate_nodes=[1],
+        mates=[np.eye(4)],
+        constants=[target],
+        ops=[(SET, 1, 0)],
+    )
+
+
+def test_residuals_without_pairs():
+    program = location_program()
+    residuals = program.solve().residuals()
+    assert residuals.pairs == []
+    assert residuals.max() == (0.0, 0.0)
+    assert residuals.report() == []
+    assert residuals.report(sort="angle", limit=5) == []
+    assert residuals.violations().shape == (0,)
+
+
+def test_residuals_without_pairs_batched():
+    residuals = location_program().solve(np.zeros((10, 0))).residuals()
+    assert residuals.report() == []
+
+
+def test_assembly_with_location_targets():
+    cq = pytest.importorskip("cadquery")
+    from cadquery_massembly import MAssembly, Mate
+
+    assy = MAssembly(cq.Workplane().box(1, 1, 1), name="root")
+    assy.add(cq.Workplane().box(1, 1, 1), name="part")
+    assy.mate("part", Mate(), name="part", origin=True)
+    assy.assemble("part", cq.Location(cq.Vector(1, 2, 3)))
+
+    assert assy.residuals().report() == []
+
+
+def test_report_orders_worst_pair_first():
+    from cadquery_massembly.kinematics import Residuals
+
+    residuals = Residuals([("a", "b"), ("c", "d")], np.array([[0.0, 2.0], [1.0, np.nan]]), np.zeros((2, 2)))
+    assert [row[:2] for row in residuals.report()] == [("c", "d"), ("a", "b")]
+    assert residuals.report(limit=1)[0][2] == np.inf
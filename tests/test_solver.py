@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+cq = pytest.importorskip("cadquery")
+
+from cadquery_massembly import DOF  # noqa: E402
+from cadquery_massembly.geom import Circle  # noqa: E402
+
+KEY = ("coupler_C", "rocker_C")
+
+
+def sweep(assy, drive, alphas, solution=0):
+    # intersection branch and world position of the coupler end C per frame. Only the first frame asks for
+    # solution, all others for the other one, so the branch can only be kept by the seeds
+    branches, points = [], []
+    for i, alpha in enumerate(alphas):
+        drive(assy, alpha, solution if i == 0 else 1 - solution)
+        branches.append(assy._steps[-1].branch)
+        points.append(assy.mates["coupler_C"].world_mate.origin.toTuple())
+    return branches, np.array(points)
+
+
+def test_intersect_near():
+    circle1, circle2 = Circle(5, (0, 0, 0)), Circle(5, (6, 0, 0))
+    for seed, expected in (((3, 3.5, 0), (3, 4, 0)), ((2, -5, 0), (3, -4, 0))):
+        point, iterations = circle1.intersect_near(circle2, cq.Vector(*seed), tol=1e-9)
+        assert (point - cq.Vector(*expected)).Length < 1e-9
+        assert 0 < iterations <= 10
+
+    point, iterations = circle1.intersect_near(circle2, cq.Vector(3, 4, 0))
+    assert (point - cq.Vector(3, 4, 0)).Length < 1e-6
+    assert iterations == 0
+
+    # circles without intersection do not converge
+    point, iterations = circle1.intersect_near(Circle(1, (20, 0, 0)), cq.Vector(3, 4, 0), max_iter=5)
+    assert point is None
+
+
+@pytest.mark.parametrize("solution", [0, 1])
+def test_warm_start_keeps_the_branch(four_bar, drive, solution):
+    assy = four_bar(alpha=0, solution=solution).warm_start(tol=1e-9)
+    alphas = np.arange(0, 720, 5).tolist()
+    branches, points = sweep(assy, drive, alphas, solution)
+
+    assert len(set(branches)) == 1
+    assert assy.solver.cold_starts == 1  # only the first frame has no seed
+    assert assy.solver.iterations[KEY] > 0
+    assert 0 < assy.solver.total_iterations <= len(alphas) * assy.solver.max_iter
+    assert np.allclose(points[:72], points[72:], rtol=0, atol=1e-6)  # periodic, the coupler never flips
+
+    # the same sweep solved by a compiled program on the assembled branch
+    program = four_bar(solution=solution).compile({"crank": DOF("crank_A", "ground_A", "rz")})
+    world = program.world(program.run({"crank": alphas}))
+    c = world[:, program.nodes.index("coupler")] @ program.mates[program.mate_names.index("coupler_C")]
+    assert np.allclose(c[:, :3, 3], points, rtol=0, atol=1e-6)
+
+
+def test_fallback_stays_on_the_branch(four_bar, drive):
+    # without iterations the seed never converges, every frame falls back to the closest cold solution
+    assy = four_bar(alpha=0, solution=1).warm_start(max_iter=0)
+    branches, _ = sweep(assy, drive, range(0, 360, 10), solution=1)
+    assert len(set(branches)) == 1
+    assert assy.solver.cold_starts == 36
+    assert assy.solver.total_iterations == 0
+
+    # without warm starts the requested solution is used
+    branches, _ = sweep(four_bar(alpha=0, solution=1), drive, range(0, 360, 10), solution=1)
+    assert len(set(branches)) == 2
+
+
+def test_warm_start_off(four_bar, drive):
+    assy = four_bar(alpha=0).warm_start()
+    sweep(assy, drive, [0, 10])
+    assy.solver.reset()
+    assert (assy.solver.cold_starts, assy.solver.total_iterations, assy.solver.seeds) == (0, 0, {})
+    assert assy.warm_start(False).solver is None
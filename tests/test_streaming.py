@@ -0,0 +1,75 @@
+import asyncio
+import itertools
+
+import numpy as np
+
+from cadquery_massembly.streaming import DeltaEncoder, PoseStream, decode_delta
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_stream_yields_all_poses_in_order(turning_program):
+    program = turning_program()
+
+    async def consume():
+        async with PoseStream(program, [{"angle": a} for a in range(5)], drop=False) as poses:
+            return [float(pose.joints[0]) async for pose in poses]
+
+    assert run(consume()) == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_break_cancels_the_producer(turning_program):
+    program = turning_program()
+    stream = PoseStream(program, ({"angle": a} for a in itertools.count()), maxsize=1, drop=True)
+
+    async def consume():
+        async for _ in stream:
+            break
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        return stream._task.done()
+
+    assert run(consume())
+
+
+def test_errors_are_handed_to_the_consumer(turning_program):
+    program = turning_program()
+
+    async def consume():
+        async for _ in PoseStream(program, [{"unknown": 1}]):
+            pass
+
+    try:
+        run(consume())
+    except ValueError as ex:
+        assert "Unknown joints" in str(ex)
+    else:
+        raise AssertionError("ValueError expected")
+
+
+def test_delta_round_trip(turning_program):
+    program = turning_program()
+    encoder = DeltaEncoder(tol=1e-6)
+    received = None
+    sizes = []
+    for angle in (0.0, 10.0, 10.0, 20.0, 20.0 + 1e-9):
+        world = program.solve({"angle": angle}).world()
+        data = encoder.encode(world)
+        received = decode_delta(data, received)
+        sizes.append(len(data))
+        assert np.allclose(received, world, atol=1e-6)
+
+    # the first frame contains all nodes (52 bytes each), then only the moved arm or nothing
+    assert sizes == [104, 52, 0, 52, 0]
+
+
+def test_stream_deltas(turning_program):
+    program = turning_program()
+
+    async def consume():
+        async with PoseStream(program, [{"angle": a} for a in (0, 0, 5)], drop=False) as poses:
+            return [len(data) async for data in poses.deltas()]
+
+    assert run(consume()) == [104, 0, 52]
@@ -0,0 +1,69 @@
+import csv
+
+import numpy as np
+import pytest
+
+from cadquery_massembly.kinematics import Program
+from cadquery_massembly.study import Study, StudyResult, parameter_grid, parameter_samples
+
+
+def build(length=1.0):
+    if length < 0:
+        raise ValueError("a, b")
+    return Program(
+        nodes=["root"],
+        parents=[-1],
+        locs=[np.eye(4)],
+        mate_names=[],
+        mate_nodes=[],
+        mates=[],
+        constants=[],
+        ops=[],
+        trackers=["tip"],
+        tracker_nodes=[0],
+        tracker_points=[(length, 0, 0)],
+    )
+
+
+def reach(trajectories):
+    return trajectories["tip"][..., 0].max()
+
+
+def test_parameter_grid_and_samples():
+    assert len(parameter_grid(a=[1, 2, 3], b=[4, 5])) == 6
+    samples = parameter_samples(10, seed=1, a=(0, 1))
+    values = np.sort([s["a"] for s in samples])
+    # one sample per stratum
+    assert np.all(np.floor(values * 10) == np.arange(10))
+
+
+def test_run_and_save_with_errors(tmp_path):
+    result = Study(build, np.zeros((3, 0)), {"reach": reach}).run(parameter_grid(length=[2.0, -1.0, 1.0]))
+    assert result.columns["reach"][0] == 2.0
+    assert np.isnan(result.columns["reach"][1])
+    assert result.columns["error"][1] == "ValueError: a, b"
+
+    filename = tmp_path / "study.csv"
+    result.save(str(filename))
+    with open(filename, newline="") as fd:
+        rows = list(csv.reader(fd))
+    assert rows[0] == ["length", "reach", "error"]
+    assert rows[2] == ["-1.0", "nan", "ValueError: a, b"]
+    assert all(len(row) == 3 for row in rows)
+
+
+def test_sorted():
+    result = StudyResult({"a": np.array([2.0, np.nan, 1.0]), "error": np.array(["", "x", ""])})
+    assert result.sorted("a").columns["a"].tolist()[:2] == [1.0, 2.0]
+    assert result.sorted("a", descending=True).columns["a"].tolist()[:2] == [2.0, 1.0]
+    with pytest.raises(ValueError):
+        result.sorted("error")
+    with pytest.raises(ValueError):
+        result.sorted("missing")
+
+
+def test_metric_name_collisions():
+    with pytest.raises(ValueError):
+        Study(build, np.zeros((1, 0)), {"length": reach}).run([{"length": 1.0}])
+    with pytest.raises(ValueError):
+        Study(build, np.zeros((1, 0)), {"error": reach}).run([{"length": 1.0}])